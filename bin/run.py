@@ -31,6 +31,9 @@ def main():
         logging.warning(get_timestamp() + 'Must be using Python 3.7 to run TIMSCONVERT.')
         sys.exit(1)
 
+    # Use faster zlib and base64 implementations for binary data arrays if they are installed.
+    init_accelerated_encoding()
+
     # Initialize Bruker DLL.
     logging.info(get_timestamp() + ':' + 'Initialize Bruker .dll file...')
     tdf_sdk_dll = init_tdf_sdk_api()
@@ -85,7 +88,8 @@ def main():
                             run_args['encoding'],
                             run_args['compression'],
                             run_args['barebones_metadata'],
-                            run_args['chunk_size'])
+                            run_args['chunk_size'],
+                            run_args['num_workers'])
 
         # TSF ESI-MS Dataset
         elif schema == 'TSF' and 'MaldiApplicationType' not in data.analysis['GlobalMetadata'].keys():
@@ -104,7 +108,8 @@ def main():
                             run_args['encoding'],
                             run_args['compression'],
                             run_args['barebones_metadata'],
-                            run_args['chunk_size'])
+                            run_args['chunk_size'],
+                            run_args['num_workers'])
 
         # TSF MALDI-qTOF Dried Droplet Dataset
         elif schema == 'TSF' \
@@ -126,7 +131,8 @@ def main():
                                 run_args['compression'],
                                 run_args['maldi_output_file'],
                                 run_args['maldi_plate_map'],
-                                run_args['barebones_metadata'])
+                                run_args['barebones_metadata'],
+                                run_args['num_workers'])
 
         # TSF MALDI-qTOF MSI Dataset
         elif schema == 'TSF' \
@@ -145,7 +151,8 @@ def main():
                                   run_args['imzml_mode'],
                                   run_args['encoding'],
                                   run_args['compression'],
-                                  run_args['chunk_size'])
+                                  run_args['chunk_size'],
+                                  run_args['num_workers'])
 
         # TDF ESI-TIMS-MS Dataset
         elif schema == 'TDF' \
@@ -165,7 +172,8 @@ def main():
                             run_args['encoding'],
                             run_args['compression'],
                             run_args['barebones_metadata'],
-                            run_args['chunk_size'])
+                            run_args['chunk_size'],
+                            run_args['num_workers'])
 
         # TDF MALDI-TIMS-qTOF Dried Droplet Dataset
         elif schema == 'TDF' \
@@ -187,7 +195,8 @@ def main():
                                 run_args['compression'],
                                 run_args['maldi_output_file'],
                                 run_args['maldi_plate_map'],
-                                run_args['barebones_metadata'])
+                                run_args['barebones_metadata'],
+                                run_args['num_workers'])
 
         # TDF MALDI-TIMS-qTOF MSI Dataset
         elif schema == 'TDF' \
@@ -206,7 +215,8 @@ def main():
                                   run_args['imzml_mode'],
                                   run_args['encoding'],
                                   run_args['compression'],
-                                  run_args['chunk_size'])
+                                  run_args['chunk_size'],
+                                  run_args['num_workers'])
 
         else:
             logging.warning(get_timestamp() + ':' + 'Unable to determine acquisition mode using metadata for' +
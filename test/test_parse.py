@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from timsconvert.parse import merge_sorted_bins, get_uniform_bin_indices, sort_and_deduplicate_peaks
+
+
+def reference_bins(mz_array, intensity_array, bins):
+    # Binning as done before timsconvert.parse.merge_sorted_bins() was introduced.
+    unique_indices, inverse_indices = np.unique(np.digitize(mz_array, bins), return_inverse=True)
+    bin_counts = np.bincount(inverse_indices)
+    np.place(bin_counts, bin_counts < 1, [1])
+    mz_array = np.bincount(inverse_indices, weights=mz_array) / bin_counts
+    intensity_array = np.bincount(inverse_indices, weights=intensity_array)
+    return mz_array, intensity_array
+
+
+def reference_unique_peaks(*arrays):
+    # Sorting and deduplication as done before timsconvert.parse.sort_and_deduplicate_peaks() was introduced.
+    peaks = np.stack(arrays, axis=-1)
+    peaks = np.unique(peaks[np.argsort(peaks[:, 0])], axis=0)
+    return tuple(peaks[:, i] for i in range(len(arrays)))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_merge_sorted_bins(seed):
+    rng = np.random.RandomState(seed)
+    mz_array = np.sort(rng.uniform(100, 1500, 5000))
+    intensity_array = rng.uniform(0, 1e5, 5000)
+    bins = np.linspace(mz_array[0], mz_array[-1], 1000)
+    mz, intensity = merge_sorted_bins(mz_array, intensity_array, np.searchsorted(bins, mz_array, side='right'))
+    reference_mz, reference_intensity = reference_bins(mz_array, intensity_array, bins)
+    np.testing.assert_allclose(mz, reference_mz, rtol=1e-12)
+    np.testing.assert_allclose(intensity, reference_intensity, rtol=1e-12)
+
+
+def test_merge_sorted_bins_single_bin():
+    mz, intensity = merge_sorted_bins(np.array([100.0, 200.0]), np.array([1.0, 3.0]), np.array([4, 4]))
+    np.testing.assert_array_equal(mz, [150.0])
+    np.testing.assert_array_equal(intensity, [4.0])
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_get_uniform_bin_indices(dtype):
+    rng = np.random.RandomState(0)
+    bin_size = 0.005
+    bins = np.arange(100, 1700, bin_size, dtype=dtype)
+    # Include values below the first and above the last bin edge as well as values on the bin edges.
+    values = np.concatenate((rng.uniform(90, 1710, 100000), bins[::97].astype(np.float64)))
+    np.testing.assert_array_equal(get_uniform_bin_indices(values, bins, bin_size),
+                                  np.searchsorted(bins, values, side='right'))
+
+
+def test_get_uniform_bin_indices_empty_bins():
+    values = np.array([1.0, 2.0])
+    np.testing.assert_array_equal(get_uniform_bin_indices(values, np.array([], dtype=np.float64), 0.005), [0, 0])
+
+
+def test_sort_and_deduplicate_peaks():
+    rng = np.random.RandomState(0)
+    # Rounded values so that identical and partially identical peaks occur.
+    mz_array = np.round(rng.uniform(100, 110, 2000), 1)
+    intensity_array = np.round(rng.uniform(0, 10, 2000))
+    mz, intensity = sort_and_deduplicate_peaks(mz_array, intensity_array)
+    reference_mz, reference_intensity = reference_unique_peaks(mz_array, intensity_array)
+    np.testing.assert_array_equal(mz, reference_mz)
+    np.testing.assert_array_equal(intensity, reference_intensity)
+
+
+def test_sort_and_deduplicate_peaks_with_mobility():
+    rng = np.random.RandomState(1)
+    mz_array = np.round(rng.uniform(100, 110, 2000), 1)
+    intensity_array = np.round(rng.uniform(0, 5, 2000))
+    mobility_array = np.round(rng.uniform(0.5, 0.6, 2000), 2)
+    mz, intensity, mobility = sort_and_deduplicate_peaks(mz_array, intensity_array, mobility_array)
+    reference_mz, reference_intensity, reference_mobility = reference_unique_peaks(mz_array,
+                                                                                   intensity_array,
+                                                                                   mobility_array)
+    np.testing.assert_array_equal(mz, reference_mz)
+    np.testing.assert_array_equal(intensity, reference_intensity)
+    np.testing.assert_array_equal(mobility, reference_mobility)
@@ -0,0 +1,156 @@
+import base64
+import hashlib
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from psims.mzml import MzMLWriter
+from psims.mzml import binary_encoding as psims_binary_encoding
+from pyimzml import compression as pyimzml_compression
+from pyimzml.compression import ZlibCompression
+from pyimzml.ImzMLParser import ImzMLParser
+from pyimzml.ImzMLWriter import ImzMLWriter
+
+import timsconvert.write
+from timsconvert.classes import TimsconvertTsfData
+from timsconvert.write import (format_spectra_count, update_spectra_count, init_accelerated_encoding,
+                               init_imzml_ibd_buffer, release_imzml_ibd_pages, write_maldi_dd_mzml,
+                               iterate_maldi_ims_frame_ranges, write_maldi_ims_chunk_list_to_imzml)
+
+
+def write_test_mzml(filename, count, num_of_spectra):
+    with MzMLWriter(open(filename, 'wb'), close=True) as writer:
+        writer.controlled_vocabularies()
+        writer.file_description(['MS1 spectrum'])
+        with writer.run(id='run'):
+            with writer.spectrum_list(count=count):
+                for i in range(num_of_spectra):
+                    writer.write_spectrum(np.arange(10, dtype=np.float64),
+                                          np.ones(10, dtype=np.float64),
+                                          id='scan=' + str(i + 1),
+                                          params=['MS1 spectrum', {'ms level': 1}])
+
+
+def has_valid_checksum(filename):
+    with open(filename, 'rb') as mzml_file:
+        contents = mzml_file.read()
+    checksum_offset = contents.rfind(b'<fileChecksum>') + len(b'<fileChecksum>')
+    return hashlib.sha1(contents[:checksum_offset]).hexdigest().encode() == \
+        contents[checksum_offset:checksum_offset + 40]
+
+
+@pytest.mark.parametrize('num_of_spectra,scan_count', [(5, 3), (3, 3), (1000000000, 7)])
+def test_update_spectra_count(tmp_path, num_of_spectra, scan_count):
+    write_test_mzml(str(tmp_path / 'test_tmp.mzML'), format_spectra_count(num_of_spectra), scan_count)
+    update_spectra_count(str(tmp_path), 'test.mzML', num_of_spectra, scan_count)
+    assert not os.path.exists(str(tmp_path / 'test_tmp.mzML'))
+    with open(str(tmp_path / 'test.mzML'), 'rb') as mzml_file:
+        contents = mzml_file.read()
+    assert ('<spectrumList count="' + format_spectra_count(scan_count) + '"').encode() in contents
+    assert contents.count(b'<spectrum ') == scan_count
+    assert has_valid_checksum(str(tmp_path / 'test.mzML'))
+
+
+def test_init_accelerated_encoding_round_trip(monkeypatch):
+    # Restore the modules used by psims and pyimzML once the test has finished.
+    monkeypatch.setattr(psims_binary_encoding, 'zlib', psims_binary_encoding.zlib)
+    monkeypatch.setattr(psims_binary_encoding, 'base64', psims_binary_encoding.base64)
+    monkeypatch.setattr(pyimzml_compression, 'zlib', pyimzml_compression.zlib)
+    monkeypatch.setattr(timsconvert.write, 'ACCELERATED_ENCODING', timsconvert.write.ACCELERATED_ENCODING)
+    backends = init_accelerated_encoding()
+    assert set(backends.keys()) == {'zlib', 'base64'}
+    array = np.random.RandomState(0).uniform(100, 2000, 10000)
+    for dtype in (np.float64, np.float32):
+        # Arrays encoded by psims are decoded with the standard library modules.
+        encoded = psims_binary_encoding.encode_array(array, compression='zlib', dtype=dtype)
+        np.testing.assert_array_equal(np.frombuffer(zlib.decompress(base64.b64decode(encoded)), dtype=dtype),
+                                      array.astype(dtype))
+        encoded = psims_binary_encoding.encode_array(array, compression='none', dtype=dtype)
+        np.testing.assert_array_equal(np.frombuffer(base64.b64decode(encoded), dtype=dtype), array.astype(dtype))
+    # pyimzML compresses the .ibd data only.
+    compressed = ZlibCompression().compress(array.tobytes())
+    np.testing.assert_array_equal(np.frombuffer(zlib.decompress(compressed), dtype=np.float64), array)
+
+
+@pytest.mark.parametrize('imzml_mode', ['processed', 'continuous'])
+def test_init_imzml_ibd_buffer(tmp_path, imzml_mode):
+    filename = str(tmp_path / 'test.imzML')
+    rng = np.random.RandomState(0)
+    mz_array = np.sort(rng.uniform(100, 2000, 100))
+    intensity_arrays = [rng.uniform(0, 1e4, 100) for i in range(20)]
+    with ImzMLWriter(filename, mode=imzml_mode) as writer:
+        assert init_imzml_ibd_buffer(writer, buffer_size=1024)
+        for i, intensity_array in enumerate(intensity_arrays):
+            writer.addSpectrum(mz_array, intensity_array, (i + 1, 1, 1))
+    parser = ImzMLParser(filename)
+    for i, intensity_array in enumerate(intensity_arrays):
+        mzs, intensities = parser.getspectrum(i)
+        np.testing.assert_array_equal(mzs, mz_array)
+        np.testing.assert_allclose(intensities, intensity_array.astype(np.float32))
+    # The .ibd checksum in the .imzML file is calculated by pyimzML independently of the reopened file object.
+    with open(str(tmp_path / 'test.ibd'), 'rb') as ibd_file:
+        ibd_sha1 = hashlib.sha1(ibd_file.read()).hexdigest().upper()
+    with open(filename) as imzml_file:
+        assert ibd_sha1 in imzml_file.read()
+
+
+def test_release_imzml_ibd_pages(tmp_path):
+    filename = str(tmp_path / 'test.imzML')
+    rng = np.random.RandomState(0)
+    mz_array = np.sort(rng.uniform(100, 2000, 100))
+    intensity_arrays = [rng.uniform(0, 1e4, 100) for i in range(5)]
+    with ImzMLWriter(filename, mode='processed') as writer:
+        init_imzml_ibd_buffer(writer)
+        released_offset = 0
+        for i, intensity_array in enumerate(intensity_arrays):
+            writer.addSpectrum(mz_array, intensity_array, (i + 1, 1, 1))
+            # Nothing is released until release_size bytes have been written since the last release.
+            assert release_imzml_ibd_pages(writer, released_offset) == released_offset
+            new_offset = release_imzml_ibd_pages(writer, released_offset, release_size=1)
+            if hasattr(os, 'posix_fadvise') and hasattr(os, 'fdatasync'):
+                assert new_offset == writer.ibd.tell() > released_offset
+            released_offset = new_offset
+    parser = ImzMLParser(filename)
+    for i, intensity_array in enumerate(intensity_arrays):
+        np.testing.assert_allclose(parser.getspectrum(i)[1], intensity_array.astype(np.float32))
+
+
+def test_write_maldi_dd_mzml_individual_skips_spots_without_sample(tmp_path, monkeypatch):
+    # A2 is an empty well (read as NaN) and C1 is not on the plate map.
+    plate_map = tmp_path / 'plate_map.csv'
+    plate_map.write_text('sample_a,\nsample_b,sample_c\n')
+    list_of_scan_dicts = [{'coord': coord, 'ms_level': 1} for coord in ['A1', 'A2', 'C1', 'B2']]
+    titles = []
+    monkeypatch.setattr(timsconvert.write, 'parse_maldi_frames', lambda *args, **kwargs: iter(list_of_scan_dicts))
+    monkeypatch.setattr(timsconvert.write, 'write_mzml_metadata', lambda *args: None)
+    monkeypatch.setattr(timsconvert.write, 'write_ms1_spectrum', lambda *args, title=None: titles.append(title))
+    data = TimsconvertTsfData.__new__(TimsconvertTsfData)
+    data.analysis = {'Frames': pd.DataFrame({'Id': [1, 2, 3, 4]}), 'GlobalMetadata': {'SchemaType': 'TSF'}}
+    outdir = tmp_path / 'output'
+    outdir.mkdir()
+    write_maldi_dd_mzml(data, 'test.d', str(outdir), 'test.mzML', 'centroid', False, False, 0, 64, 'zlib',
+                        'individual', str(plate_map), False)
+    assert titles == ['sample_a', 'sample_c']
+    assert sorted(os.listdir(str(outdir))) == ['sample_a_A1.mzML', 'sample_c_B2.mzML']
+
+
+def test_write_maldi_ims_chunk_list_to_imzml_shares_parser_across_chunks(monkeypatch):
+    frame_ranges = [(frame, frame + 1) for frame in range(1, 12)]
+    written_frames = []
+    monkeypatch.setattr(timsconvert.write, 'parse_maldi_chunk_to_list',
+                        lambda data, frame_start, frame_stop, *args: [{'frame': frame_start}])
+    monkeypatch.setattr(timsconvert.write, 'write_maldi_ims_scans_to_imzml',
+                        lambda data, imzml_file, list_of_scan_dicts, *args: written_frames.extend(
+                            scan_dict['frame'] for scan_dict in list_of_scan_dicts))
+    parsed_frame_ranges = iterate_maldi_ims_frame_ranges(None, frame_ranges, 'centroid', False, 0, 64)
+    try:
+        for chunk in range(0, len(frame_ranges), 4):
+            chunk_list = frame_ranges[chunk: chunk + 4]
+            write_maldi_ims_chunk_list_to_imzml(None, None, chunk_list, parsed_frame_ranges, 'centroid', False)
+            # Each chunk writes exactly its own frames from the iterator shared by all chunks.
+            assert written_frames[-len(chunk_list):] == [frame_start for frame_start, frame_stop in chunk_list]
+    finally:
+        parsed_frame_ranges.close()
+    assert written_frames == list(range(1, 12))
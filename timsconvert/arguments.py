@@ -89,6 +89,10 @@ def get_args(server=False):
                         help=arg_descriptions['chunk_size'],
                         default=10,
                         type=int)
+    system.add_argument('--num_workers',
+                        help=arg_descriptions['num_workers'],
+                        default=1,
+                        type=int)
     system.add_argument('--verbose',
                         help=arg_descriptions['verbose'],
                         action='store_true')
@@ -136,6 +140,11 @@ def args_check(args):
         print(get_timestamp() + ':' + 'Plate map path does not exist...')
         print(get_timestamp() + ':' + 'Exiting...')
         sys.exit(1)
+    # Check if number of worker processes is valid.
+    if 'num_workers' in args.keys() and args['num_workers'] < 1:
+        print(get_timestamp() + ':' + 'Number of worker processes must be at least 1...')
+        print(get_timestamp() + ':' + 'Exiting...')
+        sys.exit(1)
     # Check if server URL is valid.
     if 'url' in args.keys():
         response = requests.get(args['url'])
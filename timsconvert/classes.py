@@ -1,8 +1,97 @@
+import os
+import numpy as np
 from pyBaf2Sql.classes import BafData
 from pyTDFSDK.classes import TsfData, TdfData
 from pyTDFSDK.ctypes_data_structures import PressureCompensationStrategy
 
 
+def index_table(analysis, table_name, key):
+    """
+    Index the rows of a table from analysis.tdf/analysis.tsf/analysis.sqlite by the value of one of its columns so that
+    the row for a frame/spectrum can be looked up without filtering the entire table on every iteration. If multiple
+    rows share the same key, the first row is kept.
+
+    :param analysis: Dictionary of tables loaded from the analysis database (data.analysis).
+    :type analysis: dict
+    :param table_name: Name of the table to index.
+    :type table_name: str
+    :param key: Name of the column containing the integer key.
+    :type key: str
+    :return: Dictionary ({key: row}) with each row stored as a dictionary; empty if the table does not exist.
+    :rtype: dict
+    """
+    rows = {}
+    if table_name in analysis.keys():
+        for row in analysis[table_name].to_dict(orient='records'):
+            rows.setdefault(int(row[key]), row)
+    return rows
+
+
+def group_table(analysis, table_name, key):
+    """
+    Group the rows of a table from analysis.tdf/analysis.tsf/analysis.sqlite by the value of one of its columns so that
+    all rows for a frame/precursor/window group can be looked up without filtering the entire table on every
+    iteration. Rows keep their original order within each group.
+
+    :param analysis: Dictionary of tables loaded from the analysis database (data.analysis).
+    :type analysis: dict
+    :param table_name: Name of the table to group.
+    :type table_name: str
+    :param key: Name of the column containing the integer key.
+    :type key: str
+    :return: Dictionary ({key: [rows]}) with each row stored as a dictionary; empty if the table does not exist.
+    :rtype: dict
+    """
+    groups = {}
+    if table_name in analysis.keys():
+        for row in analysis[table_name].to_dict(orient='records'):
+            groups.setdefault(int(row[key]), []).append(row)
+    return groups
+
+
+def prefetch_frames_from_binary(binary_file, frames_dict, frame_start, frame_stop=None):
+    """
+    Ask the operating system to start reading the part of an analysis.tdf_bin/analysis.tsf_bin file that holds a range
+    of frames into the page cache in the background (os.posix_fadvise(..., os.POSIX_FADV_WILLNEED)), so that later
+    TDF-SDK reads of those frames do not block on disk I/O. Byte offsets are taken from the TimsId column of the Frames
+    table. Does nothing on platforms without os.posix_fadvise or if the file cannot be opened.
+
+    :param binary_file: Path to analysis.tdf_bin or analysis.tsf_bin file.
+    :type binary_file: str
+    :param frames_dict: Frames table from analysis.tdf/analysis.tsf database indexed by frame ID using
+        timsconvert.classes.index_table().
+    :type frames_dict: dict
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive) or None to prefetch to the end of the file, defaults to None.
+    :type frame_stop: int | None
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    # Frame IDs are consecutive, so the frames bounding the range can be looked up directly.
+    start_frame = frames_dict.get(frame_start)
+    if start_frame is None or 'TimsId' not in start_frame:
+        return
+    offset = int(start_frame['TimsId'])
+    length = 0
+    if frame_stop is not None:
+        stop_frame = frames_dict.get(frame_stop)
+        if stop_frame is not None:
+            length = int(stop_frame['TimsId']) - offset
+            if length <= 0:
+                return
+    try:
+        fd = os.open(binary_file, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 class TimsconvertBafData(BafData):
     """
     Child class of pyBaf2Sql.classes.BafData containing metadata from BAF files and methods from Baf2sql library to
@@ -20,8 +109,18 @@ class TimsconvertBafData(BafData):
     def __init__(self, bruker_d_folder_name: str, baf2sql, raw_calibration=False, all_variables=True):
         # Initialize attributes and methods of the parent class.
         super().__init__(bruker_d_folder_name, baf2sql, raw_calibration, all_variables)
+        # Stored so that worker processes can open their own copy of the dataset (see timsconvert.parse).
+        self.bruker_d_folder_name = bruker_d_folder_name
+        self.init_kwargs = {'raw_calibration': raw_calibration, 'all_variables': all_variables}
         self.ms1_frames = None
+        self.variables_dict = None
+        self.steps_dict = None
+        self.spectra_dict = None
+        self.acquisitionkeys_dict = None
         self.subset_ms1_frames()
+        self.index_variables()
+        self.index_steps()
+        self.index_tables()
 
     def subset_ms1_frames(self):
         """
@@ -31,6 +130,54 @@ class TimsconvertBafData(BafData):
         """
         self.ms1_frames = self.analysis['Spectra'][self.analysis['Spectra']['AcquisitionKey'] == 1]['Id'].values.tolist()
 
+    def index_variables(self):
+        """
+        Index timsconvert.classes.BafData.analysis['Variables'] table (Variables table from analysis.sqlite) by
+        spectrum ID and variable ID. Used to look up MS/MS metadata for a spectrum without scanning the entire table
+        for every spectrum. The nested dictionary ({spectrum ID: {variable ID: value}}) is stored in
+        timsconvert.classes.TimsconvertBafData.variables_dict. If a variable is listed more than once for the same
+        spectrum, the first value is kept.
+        """
+        self.variables_dict = {}
+        if 'Variables' in self.analysis.keys() and not self.analysis['Variables'].empty:
+            spectra = self.analysis['Variables']['Spectrum'].to_numpy(dtype=np.int64)
+            variables = self.analysis['Variables']['Variable'].to_numpy(dtype=np.int64)
+            values = self.analysis['Variables']['Value'].to_numpy()
+            # np.lexsort is stable, so the first row of each (spectrum, variable) pair stays first after sorting.
+            order = np.lexsort((variables, spectra))
+            spectra = spectra[order]
+            variables = variables[order]
+            values = values[order]
+            first_rows = np.ones(spectra.size, dtype=bool)
+            first_rows[1:] = (spectra[1:] != spectra[:-1]) | (variables[1:] != variables[:-1])
+            spectra = spectra[first_rows]
+            variables = variables[first_rows].tolist()
+            values = values[first_rows].tolist()
+            spectrum_starts = np.flatnonzero(np.diff(spectra, prepend=spectra[0] - 1))
+            spectrum_ends = np.append(spectrum_starts[1:], spectra.size)
+            for spectrum, start, end in zip(spectra[spectrum_starts].tolist(),
+                                            spectrum_starts.tolist(),
+                                            spectrum_ends.tolist()):
+                self.variables_dict[spectrum] = dict(zip(variables[start:end], values[start:end]))
+
+    def index_steps(self):
+        """
+        Index timsconvert.classes.BafData.analysis['Steps'] table (Steps table from analysis.sqlite) by target
+        spectrum ID. If multiple rows share the same target spectrum, the first row is kept. The dictionary
+        ({target spectrum ID: row}) is stored in timsconvert.classes.TimsconvertBafData.steps_dict.
+        """
+        self.steps_dict = index_table(self.analysis, 'Steps', 'TargetSpectrum')
+
+    def index_tables(self):
+        """
+        Index the Spectra and AcquisitionKeys tables from analysis.sqlite by ID using timsconvert.classes.index_table()
+        so that the rows for each spectrum can be looked up while parsing. The dictionaries ({ID: row}) are stored in
+        timsconvert.classes.TimsconvertBafData.spectra_dict and
+        timsconvert.classes.TimsconvertBafData.acquisitionkeys_dict.
+        """
+        self.spectra_dict = index_table(self.analysis, 'Spectra', 'Id')
+        self.acquisitionkeys_dict = index_table(self.analysis, 'AcquisitionKeys', 'Id')
+
 
 class TimsconvertTsfData(TsfData):
     """
@@ -47,8 +194,16 @@ class TimsconvertTsfData(TsfData):
     def __init__(self, bruker_d_folder_name: str, tdf_sdk, use_recalibrated_state=True):
         # Initialize attributes and methods of the parent class.
         super().__init__(bruker_d_folder_name, tdf_sdk, use_recalibrated_state)
+        # Stored so that worker processes can open their own copy of the dataset (see timsconvert.parse).
+        self.bruker_d_folder_name = bruker_d_folder_name
+        self.init_kwargs = {'use_recalibrated_state': use_recalibrated_state}
+        self.binary_file = os.path.join(bruker_d_folder_name, 'analysis.tsf_bin')
         self.ms1_frames = None
+        self.frames_dict = None
+        self.framemsmsinfo_dict = None
+        self.maldiframeinfo_dict = None
         self.subset_ms1_frames()
+        self.index_tables()
 
     def subset_ms1_frames(self):
         """
@@ -58,6 +213,32 @@ class TimsconvertTsfData(TsfData):
         """
         self.ms1_frames = self.analysis['Frames'][self.analysis['Frames']['MsMsType'] == 0]['Id'].values.tolist()
 
+    def index_tables(self):
+        """
+        Index the Frames, FrameMsMsInfo, and MaldiFrameInfo tables from analysis.tsf by frame ID using
+        timsconvert.classes.index_table() so that the rows for each frame can be looked up while parsing. The
+        dictionaries ({frame ID: row}) are stored in timsconvert.classes.TimsconvertTsfData.frames_dict,
+        timsconvert.classes.TimsconvertTsfData.framemsmsinfo_dict, and
+        timsconvert.classes.TimsconvertTsfData.maldiframeinfo_dict (empty for LC-MS data).
+        """
+        self.frames_dict = index_table(self.analysis, 'Frames', 'Id')
+        self.framemsmsinfo_dict = index_table(self.analysis, 'FrameMsMsInfo', 'Frame')
+        self.maldiframeinfo_dict = index_table(self.analysis, 'MaldiFrameInfo', 'Frame')
+
+    def prefetch_frames(self, frame_start, frame_stop=None):
+        """
+        Start reading the frames in the given range from analysis.tsf_bin into the page cache in the background using
+        timsconvert.classes.prefetch_frames_from_binary(). Used to overlap disk I/O for the next chunk of frames with
+        parsing of the current chunk.
+
+        :param frame_start: Beginning frame number.
+        :type frame_start: int
+        :param frame_stop: Ending frame number (non-inclusive) or None to prefetch to the end of the file, defaults to
+            None.
+        :type frame_stop: int | None
+        """
+        prefetch_frames_from_binary(self.binary_file, self.frames_dict, frame_start, frame_stop)
+
 
 class TimsconvertTdfData(TdfData):
     """
@@ -82,8 +263,25 @@ class TimsconvertTdfData(TdfData):
                  pressure_compensation_strategy=PressureCompensationStrategy.NoPressureCompensation):
         # Initialize attributes and methods of the parent class.
         super().__init__(bruker_d_folder_name, tdf_sdk, use_recalibrated_state, pressure_compensation_strategy)
+        # Stored so that worker processes can open their own copy of the dataset (see timsconvert.parse).
+        self.bruker_d_folder_name = bruker_d_folder_name
+        self.init_kwargs = {'use_recalibrated_state': use_recalibrated_state,
+                            'pressure_compensation_strategy': pressure_compensation_strategy}
+        self.binary_file = os.path.join(bruker_d_folder_name, 'analysis.tdf_bin')
         self.ms1_frames = None
+        self.frames_dict = None
+        self.framemsmsinfo_dict = None
+        self.precursors_dict = None
+        self.pasefframemsmsinfo_dict = None
+        self.diaframemsmsinfo_dict = None
+        self.diaframemsmswindows_dict = None
+        self.prmframemsmsinfo_dict = None
+        self.prmtargets_dict = None
+        self.maldiframeinfo_dict = None
+        # ddaPASEF precursor m/z bins by encoding, built on first use in timsconvert.parse.
+        self.ddapasef_bins_dict = {}
         self.subset_ms1_frames()
+        self.index_tables()
 
     def subset_ms1_frames(self):
         """
@@ -94,3 +292,45 @@ class TimsconvertTdfData(TdfData):
         self.ms1_frames = self.analysis['Frames'][self.analysis['Frames']['MsMsType'] == 0]['Id'].values.tolist()
         if len(self.ms1_frames) > 0 and self.ms1_frames[0] != 1:
             self.ms1_frames.insert(0, 1)
+
+    def index_tables(self):
+        """
+        Index the frame, precursor, and window tables from analysis.tdf using timsconvert.classes.index_table() and
+        timsconvert.classes.group_table() so that the rows for each frame can be looked up while parsing. Stored as:
+
+        - timsconvert.classes.TimsconvertTdfData.frames_dict: Frames rows by frame ID.
+        - timsconvert.classes.TimsconvertTdfData.framemsmsinfo_dict: FrameMsMsInfo rows by frame ID.
+        - timsconvert.classes.TimsconvertTdfData.precursors_dict: Lists of Precursors rows by parent frame ID.
+        - timsconvert.classes.TimsconvertTdfData.pasefframemsmsinfo_dict: Lists of PasefFrameMsMsInfo rows by
+          precursor ID.
+        - timsconvert.classes.TimsconvertTdfData.diaframemsmsinfo_dict: DiaFrameMsMsInfo rows by frame ID.
+        - timsconvert.classes.TimsconvertTdfData.diaframemsmswindows_dict: Lists of DiaFrameMsMsWindows rows by window
+          group.
+        - timsconvert.classes.TimsconvertTdfData.prmframemsmsinfo_dict: PrmFrameMsMsInfo rows by frame ID.
+        - timsconvert.classes.TimsconvertTdfData.prmtargets_dict: PrmTargets rows by target ID.
+        - timsconvert.classes.TimsconvertTdfData.maldiframeinfo_dict: MaldiFrameInfo rows by frame ID (empty for LC-MS
+          data).
+        """
+        self.frames_dict = index_table(self.analysis, 'Frames', 'Id')
+        self.framemsmsinfo_dict = index_table(self.analysis, 'FrameMsMsInfo', 'Frame')
+        self.precursors_dict = group_table(self.analysis, 'Precursors', 'Parent')
+        self.pasefframemsmsinfo_dict = group_table(self.analysis, 'PasefFrameMsMsInfo', 'Precursor')
+        self.diaframemsmsinfo_dict = index_table(self.analysis, 'DiaFrameMsMsInfo', 'Frame')
+        self.diaframemsmswindows_dict = group_table(self.analysis, 'DiaFrameMsMsWindows', 'WindowGroup')
+        self.prmframemsmsinfo_dict = index_table(self.analysis, 'PrmFrameMsMsInfo', 'Frame')
+        self.prmtargets_dict = index_table(self.analysis, 'PrmTargets', 'Id')
+        self.maldiframeinfo_dict = index_table(self.analysis, 'MaldiFrameInfo', 'Frame')
+
+    def prefetch_frames(self, frame_start, frame_stop=None):
+        """
+        Start reading the frames in the given range from analysis.tdf_bin into the page cache in the background using
+        timsconvert.classes.prefetch_frames_from_binary(). Used to overlap disk I/O for the next chunk of frames with
+        parsing of the current chunk.
+
+        :param frame_start: Beginning frame number.
+        :type frame_start: int
+        :param frame_stop: Ending frame number (non-inclusive) or None to prefetch to the end of the file, defaults to
+            None.
+        :type frame_stop: int | None
+        """
+        prefetch_frames_from_binary(self.binary_file, self.frames_dict, frame_start, frame_stop)
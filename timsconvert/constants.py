@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 from timsconvert.timestamp import *
 
 
@@ -51,5 +52,17 @@ MSMS_TYPE = {'0': 'MS',
              '8': 'dda-PASEF',
              '9': 'dia-PASEF'}
 
-MSMS_TYPE_CATEGORY = {'ms1': [0],
-                      'ms2': [2, 8, 9]}
+MSMS_TYPE_CATEGORY = {'ms1': frozenset({0}),
+                      'ms2': frozenset({2, 8, 9})}
+
+ENCODING_DTYPE = {32: np.float32,
+                  64: np.float64}
+
+# psims encoding dicts for each encoding; the mobility entry is only used for spectra with a mobility array.
+SPECTRUM_ENCODING = {encoding: {'m/z array': dtype,
+                                'intensity array': dtype,
+                                'mean inverse reduced ion mobility array': dtype}
+                     for encoding, dtype in ENCODING_DTYPE.items()}
+
+BAF_POLARITY = {0: '+',
+                1: '-'}
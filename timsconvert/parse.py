@@ -1,11 +1,18 @@
 from timsconvert.constants import *
+from timsconvert.classes import TimsconvertBafData, TimsconvertTsfData, TimsconvertTdfData
+import collections
+import itertools
+import multiprocessing
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pyTDFSDK.tims import (tims_scannum_to_oneoverk0, tims_oneoverk0_to_ccs_for_mz, tims_read_scans_v2,
                            tims_index_to_mz, tims_extract_profile_for_frame,
                            tims_extract_centroided_spectrum_for_frame_v2)
 from pyTDFSDK.tsf import tsf_read_line_spectrum_v2, tsf_read_profile_spectrum_v2, tsf_index_to_mz
+from pyTDFSDK.init_tdf_sdk import init_tdf_sdk_api
 from pyBaf2Sql.baf import read_double
+from pyBaf2Sql.init_baf2sql import init_baf2sql_api
 
 
 def get_encoding_dtype(encoding):
@@ -17,10 +24,26 @@ def get_encoding_dtype(encoding):
     :return: Numpy dtype, either float64 or float32
     :rtype: numpy.dtype
     """
-    if encoding == 32:
-        return np.float32
-    elif encoding == 64:
-        return np.float64
+    return ENCODING_DTYPE[encoding]
+
+
+def get_charge_state(charge):
+    """
+    Convert a precursor charge read from the raw data into the value stored in the scan dictionary. Missing (None or
+    NaN) and zero charges are stored as None so that no charge is written for the precursor.
+
+    :param charge: Precursor charge from the raw data.
+    :type charge: int | float | None
+    :return: Precursor charge or None if the charge is unknown.
+    :rtype: int | None
+    """
+    # NaN is the only value that is not equal to itself.
+    if charge is None or charge != charge:
+        return None
+    charge = int(charge)
+    if charge == 0:
+        return None
+    return charge
 
 
 def get_centroid_status(mode, exclude_mobility=None):
@@ -53,11 +76,7 @@ def get_baf_spectrum_polarity(acquisitionkey_dict):
     :rtype: str
     """
     # Polarity == 0 -> 'positive'; Polarity == 1 -> 'negative"?
-    if int(acquisitionkey_dict['Polarity']) == 0:
-        polarity = '+'
-    elif int(acquisitionkey_dict['Polarity']) == 1:
-        polarity = '-'
-    return polarity
+    return BAF_POLARITY[int(acquisitionkey_dict['Polarity'])]
 
 
 def get_maldi_coords(data, maldiframeinfo_dict):
@@ -71,54 +90,60 @@ def get_maldi_coords(data, maldiframeinfo_dict):
     :return: x-y (or x-y-z if available) coordinates for the current spectrum.
     :rtype: tuple[int]
     """
-    if data.analysis['GlobalMetadata']['MaldiApplicationType'] == 'SingleSpectra':
+    maldi_application_type = data.analysis['GlobalMetadata']['MaldiApplicationType']
+    if maldi_application_type == 'SingleSpectra':
         coords = maldiframeinfo_dict['SpotName']
-    elif data.analysis['GlobalMetadata']['MaldiApplicationType'] == 'Imaging':
+    elif maldi_application_type == 'Imaging':
         coords = [int(maldiframeinfo_dict['XIndexPos']), int(maldiframeinfo_dict['YIndexPos'])]
-        if 'ZIndexPos' in data.analysis['MaldiFrameInfo'].columns:
+        # maldiframeinfo_dict has a key for every column of the MaldiFrameInfo table.
+        if 'ZIndexPos' in maldiframeinfo_dict:
             coords.append(int(maldiframeinfo_dict['ZIndexPos']))
         coords = tuple(coords)
     return coords
 
 
+SCAN_DICT_TEMPLATE = {'scan_number': None,
+                      'scan_type': None,
+                      'ms_level': None,
+                      'mz_array': None,
+                      'intensity_array': None,
+                      'mobility_array': None,
+                      'polarity': None,
+                      'centroided': None,
+                      'retention_time': None,
+                      'coord': None,
+                      'total_ion_current': None,
+                      'base_peak_mz': None,
+                      'base_peak_intensity': None,
+                      'high_mz': None,
+                      'low_mz': None,
+                      'target_mz': None,
+                      'isolation_lower_offset': None,
+                      'isolation_upper_offset': None,
+                      'selected_ion_mz': None,
+                      'selected_ion_intensity': None,
+                      'selected_ion_mobility': None,
+                      'selected_ion_ccs': None,
+                      'charge_state': None,
+                      'collision_energy': None,
+                      'frame': None,
+                      'parent_frame': None,
+                      'parent_scan': None,
+                      'ms2_no_precursor': False}
+
+
 def init_scan_dict():
     """
-    Initialize dictionary to store spectrum data. All values are initialized as None.
+    Initialize dictionary to store spectrum data. All values are initialized as None. The dictionary is a shallow copy
+    of timsconvert.parse.SCAN_DICT_TEMPLATE.
 
     :return: Dictionary containing standard spectrum data.
     :rtype: dict
     """
-    return {'scan_number': None,
-            'scan_type': None,
-            'ms_level': None,
-            'mz_array': None,
-            'intensity_array': None,
-            'mobility_array': None,
-            'polarity': None,
-            'centroided': None,
-            'retention_time': None,
-            'coord': None,
-            'total_ion_current': None,
-            'base_peak_mz': None,
-            'base_peak_intensity': None,
-            'high_mz': None,
-            'low_mz': None,
-            'target_mz': None,
-            'isolation_lower_offset': None,
-            'isolation_upper_offset': None,
-            'selected_ion_mz': None,
-            'selected_ion_intensity': None,
-            'selected_ion_mobility': None,
-            'selected_ion_ccs': None,
-            'charge_state': None,
-            'collision_energy': None,
-            'frame': None,
-            'parent_frame': None,
-            'parent_scan': None,
-            'ms2_no_precursor': False}
-
-
-def populate_scan_dict_w_baf_metadata(scan_dict, frames_dict, acquisitionkey_dict, mode):
+    return SCAN_DICT_TEMPLATE.copy()
+
+
+def populate_scan_dict_w_baf_metadata(scan_dict, frames_dict, acquisitionkey_dict, mode, centroided=None):
     """
     Populate spectrum data dictionary with global metadata for BAF files.
 
@@ -130,11 +155,16 @@ def populate_scan_dict_w_baf_metadata(scan_dict, frames_dict, acquisitionkey_dic
     :type acquisitionkey_dict: dict
     :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
     :type mode: str
+    :param centroided: Centroided status from timsconvert.parse.get_centroid_status() if it has already been
+        resolved for the current run, otherwise it is determined from mode, defaults to None.
+    :type centroided: bool | None
     :return: Dictionary containing standard spectrum data.
     :rtype: dict
     """
+    if centroided is None:
+        centroided = get_centroid_status(mode)[0]
     scan_dict['polarity'] = get_baf_spectrum_polarity(acquisitionkey_dict)
-    scan_dict['centroided'] = get_centroid_status(mode)[0]
+    scan_dict['centroided'] = centroided
     scan_dict['retention_time'] = float(frames_dict['Rt']) / 60
     return scan_dict
 
@@ -154,12 +184,13 @@ def populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array):
     """
     scan_dict['mz_array'] = mz_array
     scan_dict['intensity_array'] = intensity_array
-    scan_dict['total_ion_current'] = sum(intensity_array)
-    base_peak_index = np.where(intensity_array == np.max(intensity_array))
-    scan_dict['base_peak_mz'] = mz_array[base_peak_index][0].astype(float)
-    scan_dict['base_peak_intensity'] = intensity_array[base_peak_index][0].astype(float)
-    scan_dict['high_mz'] = float(max(mz_array))
-    scan_dict['low_mz'] = float(min(mz_array))
+    scan_dict['total_ion_current'] = intensity_array.sum()
+    base_peak_index = int(intensity_array.argmax())
+    scan_dict['base_peak_mz'] = float(mz_array[base_peak_index])
+    scan_dict['base_peak_intensity'] = float(intensity_array[base_peak_index])
+    # Not every extraction path guarantees ascending m/z values, so the extremes are not read from the array ends.
+    scan_dict['high_mz'] = float(mz_array.max())
+    scan_dict['low_mz'] = float(mz_array.min())
     return scan_dict
 
 
@@ -205,10 +236,7 @@ def populate_scan_dict_w_bbcid_iscid_ms2(scan_dict, frame, schema,  baf_data=Non
     if schema == 'TSF' or schema == 'TDF':
         scan_dict['collision_energy'] = float(framemsmsinfo_dict['CollisionEnergy'])
     elif schema == 'BAF':
-        collision_energy = float(baf_data.analysis['Variables'][(baf_data.analysis['Variables']['Spectrum'] == frame) &
-                                                                (baf_data.analysis['Variables']['Variable'] ==
-                                                                 5)].to_dict(orient='records')[0]['Value'])
-        scan_dict['collision_energy'] = collision_energy
+        scan_dict['collision_energy'] = float(baf_data.variables_dict[frame][5])
     scan_dict['frame'] = frame
     scan_dict['ms2_no_precursor'] = True
     return scan_dict
@@ -231,30 +259,20 @@ def populate_scan_dict_w_baf_ms2(scan_dict, baf_data, frames_dict, frame):
     """
     scan_dict['scan_type'] = 'MSn spectrum'
     scan_dict['ms_level'] = 2
-    target_mz = float(baf_data.analysis['Variables'][(baf_data.analysis['Variables']['Spectrum'] == frame) &
-                                                     (baf_data.analysis['Variables']['Variable'] ==
-                                                      7)].to_dict(orient='records')[0]['Value'])
-    scan_dict['target_mz'] = target_mz
-    isolation_width = float(baf_data.analysis['Variables'][(baf_data.analysis['Variables']['Spectrum'] == frame) &
-                                                           (baf_data.analysis['Variables']['Variable'] ==
-                                                            8)].to_dict(orient='records')[0]['Value'])
+    variables_dict = baf_data.variables_dict[frame]
+    scan_dict['target_mz'] = float(variables_dict[7])
+    isolation_width = float(variables_dict[8])
     scan_dict['isolation_lower_offset'] = isolation_width / 2
     scan_dict['isolation_upper_offset'] = isolation_width / 2
-    steps_dict = baf_data.analysis['Steps'][baf_data.analysis['Steps']['TargetSpectrum'] ==
-                                            frame].to_dict(orient='records')[0]
+    steps_dict = baf_data.steps_dict[frame]
     scan_dict['selected_ion_mz'] = float(steps_dict['Mass'])
-    scan_dict['charge_state'] = baf_data.analysis['Variables'][(baf_data.analysis['Variables']['Spectrum'] == frame) &
-                                                               (baf_data.analysis['Variables']['Variable'] ==
-                                                                6)].to_dict(orient='records')[0]['Value']
-    collision_energy = baf_data.analysis['Variables'][(baf_data.analysis['Variables']['Spectrum'] == frame) &
-                                                      (baf_data.analysis['Variables']['Variable'] ==
-                                                       5)].to_dict(orient='records')[0]['Value']
-    scan_dict['collision_energy'] = collision_energy
+    scan_dict['charge_state'] = get_charge_state(variables_dict[6])
+    scan_dict['collision_energy'] = variables_dict[5]
     scan_dict['parent_frame'] = int(frames_dict['Parent'])
     return scan_dict
 
 
-def populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility=None):
+def populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility=None, centroided=None):
     """
     Populate spectrum data dictionary with global metadata for TDF and TSF files.
 
@@ -266,17 +284,23 @@ def populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exc
     :type mode: str
     :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
     :type exclude_mobility: bool | None
+    :param centroided: Centroided status from timsconvert.parse.get_centroid_status() if it has already been
+        resolved for the current run, otherwise it is determined from mode, defaults to None.
+    :type centroided: bool | None
     :return: Dictionary containing standard spectrum data.
     :rtype: dict
     """
+    if centroided is None:
+        centroided = get_centroid_status(mode, exclude_mobility)[0]
     scan_dict['polarity'] = frames_dict['Polarity']
-    scan_dict['centroided'] = get_centroid_status(mode, exclude_mobility)[0]
+    scan_dict['centroided'] = centroided
     # For ddaPASEF, parent frame RT is used because a precursor spectrum is collected over multiple scans.
     scan_dict['retention_time'] = float(frames_dict['Time']) / 60
     return scan_dict
 
 
-def populate_scan_dict_w_ddapasef_ms2(scan_dict, tdf_data, precursor_dict, pasefframemsmsinfo_dicts):
+def populate_scan_dict_w_ddapasef_ms2(scan_dict, tdf_data, precursor_dict, pasefframemsmsinfo_dicts,
+                                      selected_ion_mobility=None):
     """
     Populate spectrum data dictionary with MS2 level metadata when using ddaPASEF mode.
 
@@ -288,9 +312,16 @@ def populate_scan_dict_w_ddapasef_ms2(scan_dict, tdf_data, precursor_dict, pasef
     :type precursor_dict: dict
     :param pasefframemsmsinfo_dicts: A row from the PasefFrameMsmsInfo table in analysis.tdf/analysis.tsf database.
     :type pasefframemsmsinfo_dicts: dict
+    :param selected_ion_mobility: 1/K0 value of the precursor if it has already been calculated for all precursors in
+        the parent frame, otherwise it is calculated from the precursor scan number, defaults to None.
+    :type selected_ion_mobility: float | None
     :return: Dictionary containing standard spectrum data.
     :rtype: dict
     """
+    if selected_ion_mobility is None:
+        selected_ion_mobility = tims_scannum_to_oneoverk0(tdf_data.api, tdf_data.handle,
+                                                          int(precursor_dict['Parent']),
+                                                          np.array([int(precursor_dict['ScanNumber'])]))[0]
     scan_dict['scan_type'] = 'MSn spectrum'
     scan_dict['ms_level'] = 2
     scan_dict['target_mz'] = float(precursor_dict['AverageMz'])
@@ -298,10 +329,8 @@ def populate_scan_dict_w_ddapasef_ms2(scan_dict, tdf_data, precursor_dict, pasef
     scan_dict['isolation_upper_offset'] = float(pasefframemsmsinfo_dicts[0]['IsolationWidth']) / 2
     scan_dict['selected_ion_mz'] = float(precursor_dict['LargestPeakMz'])
     scan_dict['selected_ion_intensity'] = float(precursor_dict['Intensity'])
-    scan_dict['selected_ion_mobility'] = tims_scannum_to_oneoverk0(tdf_data.api, tdf_data.handle,
-                                                                   int(precursor_dict['Parent']),
-                                                                   np.array([int(precursor_dict['ScanNumber'])]))[0]
-    scan_dict['charge_state'] = precursor_dict['Charge']
+    scan_dict['selected_ion_mobility'] = selected_ion_mobility
+    scan_dict['charge_state'] = get_charge_state(precursor_dict['Charge'])
     scan_dict['collision_energy'] = pasefframemsmsinfo_dicts[0]['CollisionEnergy']
     scan_dict['parent_frame'] = int(precursor_dict['Parent'])
     scan_dict['parent_scan'] = int(precursor_dict['ScanNumber'])
@@ -356,7 +385,7 @@ def populate_scan_dict_w_prmpasef_ms2(tdf_data, scan_dict, prmframemsmsinfo_dict
     scan_dict['isolation_upper_offset'] = float(prmframemsmsinfo_dict['IsolationWidth']) / 2
     scan_dict['selected_ion_mz'] = float(prmframemsmsinfo_dict['IsolationMz'])
     scan_dict['selected_ion_mobility'] = float(prmtargets_dict['OneOverK0'])
-    scan_dict['charge_state'] = prmtargets_dict['Charge']
+    scan_dict['charge_state'] = get_charge_state(prmtargets_dict['Charge'])
     scan_dict['collision_energy'] = prmframemsmsinfo_dict['CollisionEnergy']
     if not np.isnan(prmtargets_dict['Charge']):
         scan_dict['selected_ion_ccs'] = tims_oneoverk0_to_ccs_for_mz(tdf_data.api,
@@ -366,7 +395,52 @@ def populate_scan_dict_w_prmpasef_ms2(tdf_data, scan_dict, prmframemsmsinfo_dict
     return scan_dict
 
 
-def populate_scan_dict_w_maldi_metadata(scan_dict, data, frames_dict, maldiframeinfo_dict, frame, mode):
+def init_maldi_scan_dict(mode, centroided=None):
+    """
+    Initialize spectrum data dictionary with the MALDI metadata that is the same for every frame in a run. Copied for
+    each frame before the per-frame metadata is added with timsconvert.parse.populate_scan_dict_w_maldi_frame_metadata().
+
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param centroided: Centroided status from timsconvert.parse.get_centroid_status() if it has already been
+        resolved for the current run, otherwise it is determined from mode, defaults to None.
+    :type centroided: bool | None
+    :return: Dictionary containing spectrum data keys with run-level MALDI metadata.
+    :rtype: dict
+    """
+    if centroided is None:
+        centroided = get_centroid_status(mode)[0]
+    scan_dict = init_scan_dict()
+    scan_dict['centroided'] = centroided
+    scan_dict['retention_time'] = 0
+    return scan_dict
+
+
+def populate_scan_dict_w_maldi_frame_metadata(scan_dict, data, frames_dict, maldiframeinfo_dict, frame):
+    """
+    Populate spectrum data dictionary with the per-frame metadata from MALDI TDF/TSF files.
+
+    :param scan_dict: Spectrum data dictionary generated from timsconvert.parse.init_maldi_scan_dict().
+    :type scan_dict: dict
+    :param data: tsf_data or tdf_data object containing metadata from analysis.tsf/analysis.tdf database.
+    :type data: timsconvert.classes.TimsconvertTsfData | timsconvert.classes.TimsconvertTdfData
+    :param frames_dict: A row from the Frames table in analysis.tdf/analysis.tsf database.
+    :type frames_dict: dict
+    :param maldiframeinfo_dict: A row from the MaldiFrameInfo table in analysis.tdf/analysis.tsf database.
+    :type maldiframeinfo_dict: dict
+    :param frame: Frame ID from the Frames table in analysis.tdf/analysis.tsf database.
+    :type frame: int
+    :return: Dictionary containing standard spectrum data.
+    :rtype: dict
+    """
+    scan_dict['coord'] = get_maldi_coords(data, maldiframeinfo_dict)
+    scan_dict['polarity'] = frames_dict['Polarity']
+    scan_dict['frame'] = frame
+    return scan_dict
+
+
+def populate_scan_dict_w_maldi_metadata(scan_dict, data, frames_dict, maldiframeinfo_dict, frame, mode,
+                                        centroided=None):
     """
     Populate spectrum data dictionary with global metadata from MALDI TDF/TSF files.
 
@@ -382,13 +456,15 @@ def populate_scan_dict_w_maldi_metadata(scan_dict, data, frames_dict, maldiframe
     :type frame: int
     :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
     :type mode: str
+    :param centroided: Centroided status from timsconvert.parse.get_centroid_status() if it has already been
+        resolved for the current run, otherwise it is determined from mode, defaults to None.
+    :type centroided: bool | None
     """
-    scan_dict['coord'] = get_maldi_coords(data, maldiframeinfo_dict)
-    scan_dict['polarity'] = frames_dict['Polarity']
-    scan_dict['centroided'] = get_centroid_status(mode)[0]
+    if centroided is None:
+        centroided = get_centroid_status(mode)[0]
+    scan_dict['centroided'] = centroided
     scan_dict['retention_time'] = 0
-    scan_dict['frame'] = frame
-    return scan_dict
+    return populate_scan_dict_w_maldi_frame_metadata(scan_dict, data, frames_dict, maldiframeinfo_dict, frame)
 
 
 def populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict, lcms=False):
@@ -410,7 +486,7 @@ def populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict, lcms=False):
     scan_dict['isolation_lower_offset'] = float(framemsmsinfo_dict['IsolationWidth']) / 2
     scan_dict['isolation_upper_offset'] = float(framemsmsinfo_dict['IsolationWidth']) / 2
     scan_dict['selected_ion_mz'] = float(framemsmsinfo_dict['TriggerMass'])
-    scan_dict['charge_state'] = framemsmsinfo_dict['PrecursorCharge']
+    scan_dict['charge_state'] = get_charge_state(framemsmsinfo_dict['PrecursorCharge'])
     scan_dict['collision_energy'] = framemsmsinfo_dict['CollisionEnergy']
     if lcms:
         scan_dict['parent_frame'] = int(framemsmsinfo_dict['Parent'])
@@ -419,7 +495,9 @@ def populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict, lcms=False):
 
 def bin_profile_spectrum(mz_array, intensity_array, profile_bins, encoding):
     """
-    Bin profile mode spectrum into N number of bins.
+    Bin profile mode spectrum into N number of bins. Binned arrays are returned in the dtype given by "encoding", and
+    intensities are summed in that dtype (float32 for 32-bit encoding). Mean m/z values are always accumulated in
+    float64 before being cast, since summing many m/z values in float32 would lose mass accuracy.
 
     :param mz_array: Array containing m/z values.
     :type mz_array: numpy.array
@@ -432,17 +510,120 @@ def bin_profile_spectrum(mz_array, intensity_array, profile_bins, encoding):
     :return: Tuple of binned_mz_array (np.array) and binned_intensity_array (np.array).
     :rtype: tuple[numpy.array]
     """
+    dtype = get_encoding_dtype(encoding)
     mz_acq_range_lower = float(mz_array[0])
     mz_acq_range_upper = float(mz_array[-1])
-    bins = np.linspace(mz_acq_range_lower, mz_acq_range_upper, profile_bins, dtype=get_encoding_dtype(encoding))
-    unique_indices, inverse_indices = np.unique(np.digitize(mz_array, bins), return_inverse=True)
-    bin_counts = np.bincount(inverse_indices)
-    np.place(bin_counts, bin_counts < 1, [1])
-    mz_array = np.bincount(inverse_indices, weights=mz_array) / bin_counts
-    intensity_array = np.bincount(inverse_indices, weights=intensity_array)
+    bins = np.linspace(mz_acq_range_lower, mz_acq_range_upper, profile_bins, dtype=dtype)
+    # bins from np.linspace are monotonically increasing, so searchsorted(side='right') gives the same indices as
+    # np.digitize without its monotonicity checks.
+    mz_array, intensity_array = merge_sorted_bins(mz_array,
+                                                  intensity_array.astype(dtype, copy=False),
+                                                  np.searchsorted(bins, mz_array, side='right'))
+    return mz_array.astype(dtype, copy=False), intensity_array
+
+
+def merge_sorted_bins(mz_array, intensity_array, bin_indices):
+    """
+    Merge peaks that fall into the same bin, returning the mean m/z value and summed intensity of each populated bin.
+    mz_array must be sorted in ascending order so that each populated bin is a contiguous run of bin_indices; the runs
+    are reduced in a single pass without the sort that np.unique(bin_indices, return_inverse=True) would perform. Mean
+    m/z values are accumulated in float64.
+
+    :param mz_array: Array containing m/z values sorted in ascending order.
+    :type mz_array: numpy.array
+    :param intensity_array: Array containing intensity values.
+    :type intensity_array: numpy.array
+    :param bin_indices: Bin index of each peak, e.g. from np.searchsorted(bins, mz_array, side='right').
+    :type bin_indices: numpy.array
+    :return: Tuple of binned_mz_array (np.array) and binned_intensity_array (np.array).
+    :rtype: tuple[numpy.array]
+    """
+    bin_starts = np.flatnonzero(np.diff(bin_indices, prepend=-1))
+    bin_counts = np.diff(np.append(bin_starts, bin_indices.size))
+    mz_array = np.add.reduceat(mz_array, bin_starts, dtype=np.float64) / bin_counts
+    intensity_array = np.add.reduceat(intensity_array, bin_starts)
     return mz_array, intensity_array
 
 
+def get_uniform_bin_indices(values, bins, bin_size):
+    """
+    Get the bin index of each value for evenly spaced bins (e.g. from np.arange()). Indices are calculated directly
+    from the bin size instead of with a binary search, then corrected by comparing against the neighbouring bin edges
+    so that they are identical to np.searchsorted(bins, values, side='right') despite floating point rounding. Bins
+    that are not float64 are binned with np.searchsorted(), since np.arange() accumulates enough rounding error in
+    float32 for the bin edges to drift by many bins over a typical m/z range.
+
+    :param values: Array containing values to bin.
+    :type values: numpy.array
+    :param bins: Array of evenly spaced, increasing bin edges.
+    :type bins: numpy.array
+    :param bin_size: Spacing between bin edges.
+    :type bin_size: float
+    :return: Array of bin indices in the range [0, len(bins)].
+    :rtype: numpy.array
+    """
+    if bins.dtype != np.float64 or bins.size == 0:
+        return np.searchsorted(bins, values, side='right')
+    bin_indices = np.floor((values - float(bins[0])) / bin_size).astype(np.intp) + 1
+    np.clip(bin_indices, 0, bins.size, out=bin_indices)
+    # Move indices that were rounded into a neighbouring bin back by one.
+    bin_indices[(bin_indices < bins.size) & (values >= bins[np.minimum(bin_indices, bins.size - 1)])] += 1
+    bin_indices[(bin_indices > 0) & (values < bins[np.maximum(bin_indices - 1, 0)])] -= 1
+    return bin_indices
+
+
+def sort_and_deduplicate_peaks(mz_array, intensity_array, mobility_array=None):
+    """
+    Sort peaks combined from multiple scans by m/z and remove duplicate peaks (identical m/z, intensity, and, if
+    given, mobility values). Equivalent to numpy.unique() on the stacked m/z, intensity, and mobility arrays with
+    axis=0, but avoids building and sorting a 2D array. Peaks from each individual scan are already sorted by m/z, so
+    the stable sort only has to merge pre-sorted runs.
+
+    :param mz_array: Array containing m/z values.
+    :type mz_array: numpy.array
+    :param intensity_array: Array containing intensity values.
+    :type intensity_array: numpy.array
+    :param mobility_array: Array containing mobility values or None for 2D spectra, defaults to None.
+    :type mobility_array: numpy.array | None
+    :return: Tuple of mz_array (np.array) and intensity_array (np.array), followed by mobility_array (np.array) if
+        mobility_array was given.
+    :rtype: tuple[numpy.array]
+    """
+    if mobility_array is None:
+        order = np.lexsort((intensity_array, mz_array))
+    else:
+        order = np.lexsort((mobility_array, intensity_array, mz_array))
+    mz_array = mz_array[order]
+    intensity_array = intensity_array[order]
+    unique_peaks = np.empty(mz_array.size, dtype=bool)
+    unique_peaks[:1] = True
+    np.not_equal(mz_array[1:], mz_array[:-1], out=unique_peaks[1:])
+    unique_peaks[1:] |= intensity_array[1:] != intensity_array[:-1]
+    if mobility_array is None:
+        return mz_array[unique_peaks], intensity_array[unique_peaks]
+    mobility_array = mobility_array[order]
+    unique_peaks[1:] |= mobility_array[1:] != mobility_array[:-1]
+    return mz_array[unique_peaks], intensity_array[unique_peaks], mobility_array[unique_peaks]
+
+
+def is_valid_spectrum(mz_array, intensity_array):
+    """
+    Check whether an extracted spectrum contains peaks that can be written out. The None checks are done first so that
+    spectra that could not be extracted are skipped instead of raising an AttributeError.
+
+    :param mz_array: Array containing m/z values or None.
+    :type mz_array: numpy.array | None
+    :param intensity_array: Array containing intensity values or None.
+    :type intensity_array: numpy.array | None
+    :return: True if both arrays exist, are non-empty, and are the same size.
+    :rtype: bool
+    """
+    return mz_array is not None \
+        and intensity_array is not None \
+        and mz_array.size != 0 \
+        and mz_array.size == intensity_array.size
+
+
 def extract_baf_spectrum(baf_data, frames_dict, mode, profile_bins, encoding):
     """
     Extract spectrum from BAF data with m/z and intensity arrays. Spectrum can either be centroid or profile mode. If
@@ -461,16 +642,15 @@ def extract_baf_spectrum(baf_data, frames_dict, mode, profile_bins, encoding):
     :return: Tuple of mz_array (np.array) and intensity_array (np.array).
     :rtype: tuple[numpy.array]
     """
+    dtype = get_encoding_dtype(encoding)
     if mode == 'raw' or mode == 'centroid':
-        mz_array = np.array(read_double(baf_data.api, baf_data.handle, int(frames_dict['LineMzId'])),
-                            dtype=get_encoding_dtype(encoding))
+        mz_array = np.array(read_double(baf_data.api, baf_data.handle, int(frames_dict['LineMzId'])), dtype=dtype)
         intensity_array = np.array(read_double(baf_data.api, baf_data.handle, int(frames_dict['LineIntensityId'])),
-                                   dtype=get_encoding_dtype(encoding))
+                                   dtype=dtype)
     elif mode == 'profile':
-        mz_array = np.array(read_double(baf_data.api, baf_data.handle, int(frames_dict['ProfileMzId'])),
-                            dtype=get_encoding_dtype(encoding))
+        mz_array = np.array(read_double(baf_data.api, baf_data.handle, int(frames_dict['ProfileMzId'])), dtype=dtype)
         intensity_array = np.array(read_double(baf_data.api, baf_data.handle, int(frames_dict['ProfileIntensityId'])),
-                                   dtype=get_encoding_dtype(encoding))
+                                   dtype=dtype)
         if profile_bins != 0:
             mz_array, intensity_array = bin_profile_spectrum(mz_array, intensity_array, profile_bins, encoding)
     return mz_array, intensity_array
@@ -508,6 +688,64 @@ def extract_tsf_spectrum(tsf_data, mode, frame, profile_bins, encoding):
     return mz_array, intensity_array
 
 
+def combine_tdf_scans(list_of_scans):
+    """
+    Combine the index and intensity buffers returned by pyTDFSDK.tims.tims_read_scans_v2() for a range of scans into
+    single arrays. Empty scans and scans with mismatched index/intensity buffers are skipped.
+
+    :param list_of_scans: List of (index_array, intensity_array) tuples, one per scan.
+    :type list_of_scans: list[tuple[numpy.array]]
+    :return: Tuple of index_array (np.array), intensity_array (np.array), valid_scans (np.array of positions of the
+        combined scans in list_of_scans), and peak_counts (np.array of the number of peaks in each combined scan) or
+        None if there are no valid scans.
+    :rtype: tuple[numpy.array] | None
+    """
+    # Validity is evaluated once over the buffer sizes of all scans rather than per scan.
+    index_sizes = np.array([scan[0].size for scan in list_of_scans], dtype=np.int64)
+    intensity_sizes = np.array([scan[1].size for scan in list_of_scans], dtype=np.int64)
+    valid_scans = np.flatnonzero((index_sizes != 0) & (index_sizes == intensity_sizes))
+    if valid_scans.size == 0:
+        return None
+    # Preallocate the combined arrays and fill them scan by scan instead of concatenating a list of arrays.
+    peak_counts = index_sizes[valid_scans]
+    peak_ends = np.cumsum(peak_counts).tolist()
+    index_array = np.empty(peak_ends[-1], dtype=list_of_scans[valid_scans[0]][0].dtype)
+    intensity_array = np.empty(peak_ends[-1], dtype=list_of_scans[valid_scans[0]][1].dtype)
+    offset = 0
+    for scan_num, peak_end in zip(valid_scans.tolist(), peak_ends):
+        index_array[offset:peak_end] = list_of_scans[scan_num][0]
+        intensity_array[offset:peak_end] = list_of_scans[scan_num][1]
+        offset = peak_end
+    return index_array, intensity_array, valid_scans, peak_counts
+
+
+def read_tdf_raw_peaks(tdf_data, frame, scan_begin, scan_end):
+    """
+    Read raw peaks from a range of scans in a TDF frame using pyTDFSDK.tims.tims_read_scans_v2() and combine them into
+    a single pair of m/z and intensity arrays. Peaks are returned in scan order and have not yet been sorted or
+    deduplicated (see timsconvert.parse.sort_and_deduplicate_peaks()).
+
+    :param tdf_data: tdf_data object containing metadata from analysis.tdf database.
+    :type tdf_data: timsconvert.classes.TimsconvertTdfData
+    :param frame: Frame ID from the Frames table in analysis.tdf/analysis.tsf database.
+    :type frame: int
+    :param scan_begin: Beginning scan number (corresponding to 1/K0 value) within frame.
+    :type scan_begin: int
+    :param scan_end: Ending scan number (corresponding to 1/K0 value) within frame (non-inclusive).
+    :type scan_end: int
+    :return: Tuple of mz_array (np.array) and intensity_array (np.array) or (None, None) if spectra are empty.
+    :rtype: tuple[numpy.array | None]
+    """
+    list_of_scans = tims_read_scans_v2(tdf_data.api, tdf_data.handle, frame, scan_begin, scan_end)
+    combined_scans = combine_tdf_scans(list_of_scans)
+    if combined_scans is None:
+        return None, None
+    index_array, intensity_array, valid_scans, peak_counts = combined_scans
+    # The index -> m/z calibration is per frame, so all indices are converted with a single call.
+    mz_array = np.asarray(tims_index_to_mz(tdf_data.api, tdf_data.handle, frame, index_array), dtype=np.float64)
+    return mz_array, intensity_array
+
+
 def extract_2d_tdf_spectrum(tdf_data, mode, frame, scan_begin, scan_end, profile_bins, encoding):
     """
     Extract spectrum from TDF data with m/z and intensity arrays. Spectrum can either be centroid or quasi-profile
@@ -533,27 +771,10 @@ def extract_2d_tdf_spectrum(tdf_data, mode, frame, scan_begin, scan_end, profile
     :rtype: tuple[numpy.array | None]
     """
     if mode == 'raw':
-        list_of_scans = tims_read_scans_v2(tdf_data.api, tdf_data.handle, frame, scan_begin, scan_end)
-        frame_mz_arrays = []
-        frame_intensity_arrays = []
-        for scan_num in range(scan_begin, scan_end):
-            if list_of_scans[scan_num][0].size != 0 \
-                    and list_of_scans[scan_num][1].size != 0 \
-                    and list_of_scans[scan_num][0].size == list_of_scans[scan_num][1].size:
-                mz_array = tims_index_to_mz(tdf_data.api, tdf_data.handle, frame, list_of_scans[scan_num][0])
-                intensity_array = list_of_scans[scan_num][1]
-                frame_mz_arrays.append(mz_array)
-                frame_intensity_arrays.append(intensity_array)
-        if frame_mz_arrays and frame_intensity_arrays:
-            frames_array = np.stack((np.concatenate(frame_mz_arrays, axis=None),
-                                     np.concatenate(frame_intensity_arrays, axis=None)),
-                                    axis=-1)
-            frames_array = np.unique(frames_array[np.argsort(frames_array[:, 0])], axis=0)
-            mz_array = frames_array[:, 0]
-            intensity_array = frames_array[:, 1]
-            return mz_array, intensity_array
-        else:
+        mz_array, intensity_array = read_tdf_raw_peaks(tdf_data, frame, scan_begin, scan_end)
+        if mz_array is None:
             return None, None
+        return sort_and_deduplicate_peaks(mz_array, intensity_array)
     elif mode == 'profile':
         index_buf, intensity_array = tims_extract_profile_for_frame(tdf_data.api,
                                                                     tdf_data.handle,
@@ -570,11 +791,48 @@ def extract_2d_tdf_spectrum(tdf_data, mode, frame, scan_begin, scan_end, profile
                                                                                   frame,
                                                                                   scan_begin,
                                                                                   scan_end)
-        mz_array = np.array(mz_array, dtype=get_encoding_dtype(encoding))
-        intensity_array = np.array(intensity_array, dtype=get_encoding_dtype(encoding))
+        dtype = get_encoding_dtype(encoding)
+        mz_array = np.array(mz_array, dtype=dtype)
+        intensity_array = np.array(intensity_array, dtype=dtype)
     return mz_array, intensity_array
 
 
+def extract_2d_tdf_spectra(tdf_data, mode, scan_ranges, profile_bins, encoding, executor=None):
+    """
+    Extract multiple spectra from TDF data using timsconvert.parse.extract_2d_tdf_spectrum(). TDF-SDK calls share
+    the same handle and are always made sequentially from the calling thread. If an executor is provided in "raw"
+    mode, sorting and deduplicating the peaks of each spectrum (see timsconvert.parse.sort_and_deduplicate_peaks()) is
+    submitted to the executor so that it overlaps with reading the next spectrum.
+
+    :param tdf_data: tdf_data object containing metadata from analysis.tdf database.
+    :type tdf_data: timsconvert.classes.TimsconvertTdfData
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param scan_ranges: List of (frame, scan_begin, scan_end) tuples, one per spectrum to extract.
+    :type scan_ranges: list[tuple[int]]
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param executor: Thread pool used to sort and deduplicate raw peaks, defaults to None.
+    :type executor: concurrent.futures.ThreadPoolExecutor | None
+    :return: List of (mz_array, intensity_array) tuples in the same order as scan_ranges; (None, None) for empty
+        spectra.
+    :rtype: list[tuple[numpy.array | None]]
+    """
+    if mode != 'raw' or executor is None:
+        return [extract_2d_tdf_spectrum(tdf_data, mode, frame, scan_begin, scan_end, profile_bins, encoding)
+                for frame, scan_begin, scan_end in scan_ranges]
+    futures = []
+    for frame, scan_begin, scan_end in scan_ranges:
+        mz_array, intensity_array = read_tdf_raw_peaks(tdf_data, frame, scan_begin, scan_end)
+        if mz_array is None:
+            futures.append(None)
+        else:
+            futures.append(executor.submit(sort_and_deduplicate_peaks, mz_array, intensity_array))
+    return [future.result() if future is not None else (None, None) for future in futures]
+
+
 def extract_3d_tdf_spectrum(tdf_data, frame, scan_begin, scan_end):
     """
     Extract spectrum from TDF data with m/z and intensity arrays. Spectrum can either be centroid or quasi-profile
@@ -594,38 +852,61 @@ def extract_3d_tdf_spectrum(tdf_data, frame, scan_begin, scan_end):
     :rtype: tuple[numpy.array | None]
     """
     list_of_scans = tims_read_scans_v2(tdf_data.api, tdf_data.handle, frame, scan_begin, scan_end)
-    frame_mz_arrays = []
-    frame_intensity_arrays = []
-    frame_mobility_arrays = []
-    if scan_begin != 0:
-        scan_end = scan_end - scan_begin
-        scan_begin = 0
-    for scan_num in range(scan_begin, scan_end):
-        if list_of_scans[scan_num][0].size != 0 \
-                and list_of_scans[scan_num][1].size != 0 \
-                and list_of_scans[scan_num][0].size == list_of_scans[scan_num][1].size:
-            mz_array = tims_index_to_mz(tdf_data.api, tdf_data.handle, frame, list_of_scans[scan_num][0])
-            intensity_array = list_of_scans[scan_num][1]
-            mobility = tims_scannum_to_oneoverk0(tdf_data.api, tdf_data.handle, frame, np.array([scan_num]))[0]
-            mobility_array = np.repeat(mobility, mz_array.size)
-            frame_mz_arrays.append(mz_array)
-            frame_intensity_arrays.append(intensity_array)
-            frame_mobility_arrays.append(mobility_array)
-    if frame_mz_arrays and frame_intensity_arrays and frame_mobility_arrays:
-        frames_array = np.stack((np.concatenate(frame_mz_arrays, axis=None),
-                                 np.concatenate(frame_intensity_arrays, axis=None),
-                                 np.concatenate(frame_mobility_arrays, axis=None)),
-                                axis=-1)
-        frames_array = np.unique(frames_array[np.argsort(frames_array[:, 0])], axis=0)
-        mz_array = frames_array[:, 0]
-        intensity_array = frames_array[:, 1]
-        mobility_array = frames_array[:, 2]
-        return mz_array, intensity_array, mobility_array
+    combined_scans = combine_tdf_scans(list_of_scans)
+    if combined_scans is not None:
+        index_array, intensity_array, valid_scans, peak_counts = combined_scans
+        # Convert all indices and scan numbers with one SDK call each; scan numbers are positions in list_of_scans.
+        mz_array = np.asarray(tims_index_to_mz(tdf_data.api, tdf_data.handle, frame, index_array), dtype=np.float64)
+        mobilities = tims_scannum_to_oneoverk0(tdf_data.api, tdf_data.handle, frame, valid_scans)
+        mobility_array = np.repeat(np.asarray(mobilities, dtype=np.float64), peak_counts)
+        # Peaks from a single scan are expected to be sorted by m/z and unique. This is not guaranteed by the SDK, so it
+        # is checked (strictly increasing m/z values are both sorted and unique) before skipping the sort.
+        if len(valid_scans) == 1 and np.all(np.diff(mz_array) > 0):
+            return mz_array, intensity_array, mobility_array
+        return sort_and_deduplicate_peaks(mz_array, intensity_array, mobility_array)
     else:
         return None, None, None
 
 
-def extract_ddapasef_precursor_spectrum(tdf_data, pasefframemsmsinfo_dicts, mode, profile_bins, encoding):
+def extract_tdf_spectrum(tdf_data, mode, frame, scan_begin, scan_end, exclude_mobility, profile_bins, encoding):
+    """
+    Extract spectrum from TDF data using timsconvert.parse.extract_3d_tdf_spectrum() if mobility data is included or
+    timsconvert.parse.extract_2d_tdf_spectrum() if it is excluded.
+
+    :param tdf_data: tdf_data object containing metadata from analysis.tdf database.
+    :type tdf_data: timsconvert.classes.TimsconvertTdfData
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param frame: Frame ID from the Frames table in analysis.tdf/analysis.tsf database.
+    :type frame: int
+    :param scan_begin: Beginning scan number (corresponding to 1/K0 value) within frame.
+    :type scan_begin: int
+    :param scan_end: Ending scan number (corresponding to 1/K0 value) within frame (non-inclusive).
+    :type scan_end: int
+    :param exclude_mobility: Whether to include mobility data in the output files.
+    :type exclude_mobility: bool
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :return: Tuple of mz_array (np.array), intensity_array (np.array), and mobility_array (np.array or None if mobility
+        is excluded) or (None, None, None) if spectra are empty.
+    :rtype: tuple[numpy.array | None]
+    """
+    if not exclude_mobility:
+        return extract_3d_tdf_spectrum(tdf_data, frame, scan_begin, scan_end)
+    mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
+                                                        mode,
+                                                        frame,
+                                                        scan_begin,
+                                                        scan_end,
+                                                        profile_bins,
+                                                        encoding)
+    return mz_array, intensity_array, None
+
+
+def extract_ddapasef_precursor_spectrum(tdf_data, pasefframemsmsinfo_dicts, mode, profile_bins, encoding,
+                                        executor=None):
     """
     Extract spectrum from TDF data with m/z and intensity arrays. Spectrum can either be centroid or quasi-profile
     mode. "Raw" mode uses pyTDFSDK.tims.tims_read_scans_v2() method, while "centroid" mode uses
@@ -642,46 +923,60 @@ def extract_ddapasef_precursor_spectrum(tdf_data, pasefframemsmsinfo_dicts, mode
     :type profile_bins: int
     :param encoding: Encoding command line parameter, either "64" or "32".
     :type encoding: int
+    :param executor: Thread pool passed to timsconvert.parse.extract_2d_tdf_spectra(), defaults to None.
+    :type executor: concurrent.futures.ThreadPoolExecutor | None
     :return: Tuple of mz_array (np.array) and intensity_array (np.array) or (None, None) if spectra are empty.
     :rtype: tuple[numpy.array | None
     """
     pasef_mz_arrays = []
     pasef_intensity_arrays = []
-    for pasef_dict in pasefframemsmsinfo_dicts:
-        scan_begin = int(pasef_dict['ScanNumBegin'])
-        scan_end = int(pasef_dict['ScanNumEnd'])
-        mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
+    scan_ranges = [(int(pasef_dict['Frame']), int(pasef_dict['ScanNumBegin']), int(pasef_dict['ScanNumEnd']))
+                   for pasef_dict in pasefframemsmsinfo_dicts]
+    for mz_array, intensity_array in extract_2d_tdf_spectra(tdf_data,
                                                             mode,
-                                                            int(pasef_dict['Frame']),
-                                                            scan_begin,
-                                                            scan_end,
+                                                            scan_ranges,
                                                             profile_bins,
-                                                            encoding)
-        if mz_array.size != 0 and intensity_array.size != 0 and mz_array.size == intensity_array.size:
+                                                            encoding,
+                                                            executor=executor):
+        if is_valid_spectrum(mz_array, intensity_array):
             pasef_mz_arrays.append(mz_array)
             pasef_intensity_arrays.append(intensity_array)
-    if pasef_mz_arrays and pasef_intensity_arrays:
-        pasef_array = np.stack((np.concatenate(pasef_mz_arrays, axis=None),
-                                np.concatenate(pasef_intensity_arrays, axis=None)),
-                               axis=-1)
-        pasef_array = np.unique(pasef_array[np.argsort(pasef_array[:, 0])], axis=0)
+    # m/z values are merged in float64 regardless of the dtype returned for each spectrum, while intensities are
+    # summed in the output dtype (float32 for 32-bit encoding) as in timsconvert.parse.bin_profile_spectrum().
+    dtype = get_encoding_dtype(encoding)
+    if len(pasef_mz_arrays) == 1:
+        # A single spectrum from TDF-SDK is normally sorted by m/z without duplicate peaks, in which case it only has
+        # to be binned. This is not guaranteed by the SDK, so it is checked (strictly increasing m/z values are both
+        # sorted and unique) before skipping timsconvert.parse.sort_and_deduplicate_peaks().
+        mz_array = np.asarray(pasef_mz_arrays[0], dtype=np.float64)
+        intensity_array = np.asarray(pasef_intensity_arrays[0], dtype=dtype)
+        if not np.all(np.diff(mz_array) > 0):
+            mz_array, intensity_array = sort_and_deduplicate_peaks(mz_array, intensity_array)
+    elif pasef_mz_arrays and pasef_intensity_arrays:
+        # The combined arrays are preallocated and filled directly instead of concatenating and then casting.
+        num_peaks = sum(pasef_mz_array.size for pasef_mz_array in pasef_mz_arrays)
+        mz_array = np.empty(num_peaks, dtype=np.float64)
+        intensity_array = np.empty(num_peaks, dtype=dtype)
+        offset = 0
+        for pasef_mz_array, pasef_intensity_array in zip(pasef_mz_arrays, pasef_intensity_arrays):
+            mz_array[offset:offset + pasef_mz_array.size] = pasef_mz_array
+            intensity_array[offset:offset + pasef_mz_array.size] = pasef_intensity_array
+            offset += pasef_mz_array.size
+        mz_array, intensity_array = sort_and_deduplicate_peaks(mz_array, intensity_array)
+    else:
+        return None, None
 
+    # The bins only depend on the acquisition m/z range, so they are built once per file and encoding.
+    bin_size = 0.005
+    bins = tdf_data.ddapasef_bins_dict.get(encoding)
+    if bins is None:
         mz_acq_range_lower = float(tdf_data.analysis['GlobalMetadata']['MzAcqRangeLower'])
         mz_acq_range_upper = float(tdf_data.analysis['GlobalMetadata']['MzAcqRangeUpper'])
-        bin_size = 0.005
-        bins = np.arange(mz_acq_range_lower, mz_acq_range_upper, bin_size,
-                         dtype=get_encoding_dtype(encoding))
-
-        unique_indices, inverse_indices = np.unique(np.digitize(pasef_array[:, 0], bins),
-                                                    return_inverse=True)
-        bin_counts = np.bincount(inverse_indices)
-        np.place(bin_counts, bin_counts < 1, [1])
-
-        mz_array = np.bincount(inverse_indices, weights=pasef_array[:, 0]) / bin_counts
-        intensity_array = np.bincount(inverse_indices, weights=pasef_array[:, 1])
-        return mz_array, intensity_array
-    else:
-        return None, None
+        bins = np.arange(mz_acq_range_lower, mz_acq_range_upper, bin_size, dtype=dtype)
+        tdf_data.ddapasef_bins_dict[encoding] = bins
+
+    # mz_array is sorted, so populated bins can be merged from contiguous runs of bin indices.
+    return merge_sorted_bins(mz_array, intensity_array, get_uniform_bin_indices(mz_array, bins, bin_size))
 
 
 def parse_lcms_baf(baf_data, frame_start, frame_stop, mode, ms2_only, profile_bins, encoding):
@@ -709,32 +1004,36 @@ def parse_lcms_baf(baf_data, frame_start, frame_stop, mode, ms2_only, profile_bi
     """
     list_of_parent_scans = []
     list_of_product_scans = []
+    centroided = get_centroid_status(mode)[0]
 
     for frame in range(frame_start, frame_stop):
         scan_dict = init_scan_dict()
-        frames_dict = baf_data.analysis['Spectra'][baf_data.analysis['Spectra']['Id'] ==
-                                                   frame].to_dict(orient='records')[0]
-        acquisitionkey_dict = baf_data.analysis['AcquisitionKeys'][baf_data.analysis['AcquisitionKeys']['Id'] ==
-                                                                   frames_dict['AcquisitionKey']].to_dict(orient='records')[0]
-        scan_dict = populate_scan_dict_w_baf_metadata(scan_dict, frames_dict, acquisitionkey_dict, mode)
+        frames_dict = baf_data.spectra_dict[frame]
+        acquisitionkey_dict = baf_data.acquisitionkeys_dict[int(frames_dict['AcquisitionKey'])]
+        scan_mode = int(acquisitionkey_dict['ScanMode'])
+        scan_dict = populate_scan_dict_w_baf_metadata(scan_dict,
+                                                      frames_dict,
+                                                      acquisitionkey_dict,
+                                                      mode,
+                                                      centroided=centroided)
 
         mz_array, intensity_array = extract_baf_spectrum(baf_data, frames_dict, mode, profile_bins, encoding)
-        if mz_array.size != 0 and intensity_array.size != 0 and mz_array.size == intensity_array.size:
+        if is_valid_spectrum(mz_array, intensity_array):
             scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
             # MS1
-            if int(acquisitionkey_dict['ScanMode']) == 0 and not ms2_only:
+            if scan_mode == 0 and not ms2_only:
                 scan_dict = populate_scan_dict_w_ms1(scan_dict, frame)
                 list_of_parent_scans.append(scan_dict)
             # Auto MS/MS and MRM MS/MS
-            elif int(acquisitionkey_dict['ScanMode']) == 2:
+            elif scan_mode == 2:
                 scan_dict = populate_scan_dict_w_baf_ms2(scan_dict, baf_data, frames_dict, frame)
                 list_of_product_scans.append(scan_dict)
             # isCID MS/MS
-            elif int(acquisitionkey_dict['ScanMode']) == 4:
+            elif scan_mode == 4:
                 scan_dict = populate_scan_dict_w_bbcid_iscid_ms2(scan_dict, frame, 'BAF', baf_data=baf_data)
                 list_of_parent_scans.append(scan_dict)
             # bbCID MS/MS
-            elif int(acquisitionkey_dict['ScanMode']) == 5:
+            elif scan_mode == 5:
                 scan_dict = populate_scan_dict_w_bbcid_iscid_ms2(scan_dict, frame, 'BAF', baf_data=baf_data)
                 list_of_parent_scans.append(scan_dict)
     return list_of_parent_scans, list_of_product_scans
@@ -765,38 +1064,44 @@ def parse_lcms_tsf(tsf_data, frame_start, frame_stop, mode, ms2_only, profile_bi
     """
     list_of_parent_scans = []
     list_of_product_scans = []
+    centroided = get_centroid_status(mode)[0]
 
     for frame in range(frame_start, frame_stop):
         scan_dict = init_scan_dict()
-        frames_dict = tsf_data.analysis['Frames'][tsf_data.analysis['Frames']['Id'] ==
-                                                  frame].to_dict(orient='records')[0]
-        scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility=None)
+        frames_dict = tsf_data.frames_dict[frame]
+        msms_type = int(frames_dict['MsMsType'])
+        scan_mode = int(frames_dict['ScanMode'])
+        scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
+                                                               frames_dict,
+                                                               mode,
+                                                               exclude_mobility=None,
+                                                               centroided=centroided)
 
         mz_array, intensity_array = extract_tsf_spectrum(tsf_data, mode, frame, profile_bins, encoding)
-        if mz_array.size != 0 and intensity_array.size != 0 and mz_array.size == intensity_array.size:
+        if is_valid_spectrum(mz_array, intensity_array):
             scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-            if int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms1'] and not ms2_only:
+            if msms_type in MSMS_TYPE_CATEGORY['ms1'] and not ms2_only:
                 scan_dict = populate_scan_dict_w_ms1(scan_dict, frame)
                 list_of_parent_scans.append(scan_dict)
-            elif int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms2']:
-                framemsmsinfo_dict = tsf_data.analysis['FrameMsMsInfo'][tsf_data.analysis['FrameMsMsInfo']['Frame'] ==
-                                                                        frame].to_dict(orient='records')[0]
-                if int(frames_dict['ScanMode']) == 1:
+            elif msms_type in MSMS_TYPE_CATEGORY['ms2']:
+                framemsmsinfo_dict = tsf_data.framemsmsinfo_dict[frame]
+                if scan_mode == 1:
                     scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict, lcms=True)
                     list_of_product_scans.append(scan_dict)
-                elif int(frames_dict['ScanMode']) == 4:
+                elif scan_mode == 4:
                     scan_dict = populate_scan_dict_w_bbcid_iscid_ms2(scan_dict,
                                                                      frame,
                                                                      'TSF',
                                                                      framemsmsinfo_dict=framemsmsinfo_dict)
                     list_of_parent_scans.append(scan_dict)
-                elif int(frames_dict['ScanMode']) == 2:
+                elif scan_mode == 2:
                     scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict)
                     list_of_parent_scans.append(scan_dict)
     return list_of_parent_scans, list_of_product_scans
 
 
-def parse_lcms_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding):
+def parse_lcms_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding,
+                   executor=None):
     """
     Parse group of frames from LC-MS(/MS) data from Bruker TDF files acquired in MS1 only, ddaPASEF MS/MS, diaPASEF
     MS/MS, bbCID MS/MS, MRM MS/MS, or prmPASEF MS/MS mode in timsControl.
@@ -817,172 +1122,168 @@ def parse_lcms_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_mo
     :type profile_bins: int
     :param encoding: Encoding command line parameter, either "64" or "32".
     :type encoding: int
+    :param executor: Thread pool used when extracting ddaPASEF precursor spectra in "raw" mode, defaults to None.
+    :type executor: concurrent.futures.ThreadPoolExecutor | None
     :return: Tuple of (list of dictionaries containing MS1 spectrum data, list of dictionaries containing MS/MS
         spectrum data).
     :rtype: tuple[list[dict]]
     """
     list_of_parent_scans = []
     list_of_product_scans = []
-    exclude_mobility = get_centroid_status(mode, exclude_mobility)[1]
+    centroided, exclude_mobility = get_centroid_status(mode, exclude_mobility)
 
     # Frame start and frame stop will only be MS1 frames; MS2 frames cannot be used as frame_start and frame_stop.
     for frame in range(frame_start, frame_stop):
         # Parse MS1 frame(s).
-        frames_dict = tdf_data.analysis['Frames'][tdf_data.analysis['Frames']['Id'] ==
-                                                  frame].to_dict(orient='records')[0]
+        frames_dict = tdf_data.frames_dict[frame]
+        msms_type = int(frames_dict['MsMsType'])
+        scan_mode = int(frames_dict['ScanMode'])
+        num_scans = int(frames_dict['NumScans'])
 
-        if int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms1'] and not ms2_only:
+        if msms_type in MSMS_TYPE_CATEGORY['ms1'] and not ms2_only:
             scan_dict = init_scan_dict()
-            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility)
+            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
+                                                                   frames_dict,
+                                                                   mode,
+                                                                   exclude_mobility,
+                                                                   centroided=centroided)
             scan_dict = populate_scan_dict_w_ms1(scan_dict, frame)
-            if not exclude_mobility:
-                mz_array, intensity_array, mobility_array = extract_3d_tdf_spectrum(tdf_data,
-                                                                                    frame,
-                                                                                    0,
-                                                                                    int(frames_dict['NumScans']))
-            elif exclude_mobility:
-                mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
-                                                                    mode,
-                                                                    frame,
-                                                                    0,
-                                                                    int(frames_dict['NumScans']),
-                                                                    profile_bins,
-                                                                    encoding)
-            if mz_array.size != 0 \
-                    and intensity_array.size != 0 \
-                    and mz_array.size == intensity_array.size \
-                    and mz_array is not None \
-                    and intensity_array is not None:
+            mz_array, intensity_array, mobility_array = extract_tdf_spectrum(tdf_data,
+                                                                             mode,
+                                                                             frame,
+                                                                             0,
+                                                                             num_scans,
+                                                                             exclude_mobility,
+                                                                             profile_bins,
+                                                                             encoding)
+            if is_valid_spectrum(mz_array, intensity_array):
                 scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-                if not exclude_mobility and mobility_array.size != 0 and mobility_array is not None:
+                if mobility_array is not None and mobility_array.size != 0:
                     scan_dict['mobility_array'] = mobility_array
                 list_of_parent_scans.append(scan_dict)
 
             # This block only runs if frame_stop - frame_start > 1, meaning MS/MS scans are detected.
             if frame_stop - frame_start > 1:
                 # Parse frames with ddaPASEF spectra for precursors.
-                if int(frames_dict['ScanMode']) == 8 and int(frames_dict['MsMsType']) == 0:
-                    precursor_dicts = tdf_data.analysis['Precursors'][tdf_data.analysis['Precursors']['Parent'] ==
-                                                                      frame].to_dict(orient='records')
-                    for precursor_dict in precursor_dicts:
+                if scan_mode == 8 and msms_type == 0:
+                    precursor_dicts = tdf_data.precursors_dict.get(frame, [])
+                    # Convert the scan numbers of all precursors in this frame to 1/K0 with a single SDK call.
+                    if precursor_dicts:
+                        precursor_mobilities = tims_scannum_to_oneoverk0(tdf_data.api,
+                                                                         tdf_data.handle,
+                                                                         frame,
+                                                                         np.array([int(precursor_dict['ScanNumber'])
+                                                                                   for precursor_dict in
+                                                                                   precursor_dicts]))
+                    else:
+                        precursor_mobilities = []
+                    for precursor_dict, precursor_mobility in zip(precursor_dicts, precursor_mobilities):
                         scan_dict = init_scan_dict()
                         scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
                                                                                frames_dict,
                                                                                mode,
-                                                                               exclude_mobility)
-                        pasefframemsmsinfo_dicts = tdf_data.analysis['PasefFrameMsMsInfo'][tdf_data.analysis['PasefFrameMsMsInfo']['Precursor'] ==
-                                                                                           precursor_dict['Id']].to_dict(orient='records')
+                                                                               exclude_mobility,
+                                                                               centroided=centroided)
+                        pasefframemsmsinfo_dicts = tdf_data.pasefframemsmsinfo_dict.get(int(precursor_dict['Id']), [])
                         mz_array, intensity_array = extract_ddapasef_precursor_spectrum(tdf_data,
                                                                                         pasefframemsmsinfo_dicts,
                                                                                         mode,
                                                                                         profile_bins,
-                                                                                        encoding)
+                                                                                        encoding,
+                                                                                        executor=executor)
                         if mz_array is not None and intensity_array is not None:
                             scan_dict = populate_scan_dict_w_ddapasef_ms2(scan_dict,
                                                                           tdf_data,
                                                                           precursor_dict,
-                                                                          pasefframemsmsinfo_dicts)
+                                                                          pasefframemsmsinfo_dicts,
+                                                                          selected_ion_mobility=precursor_mobility)
                             scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
                             list_of_product_scans.append(scan_dict)
         # Parse frames with diaPASEF spectra.
-        elif int(frames_dict['ScanMode']) == 9 and int(frames_dict['MsMsType']) == 9:
-            diaframemsmsinfo_dict = tdf_data.analysis['DiaFrameMsMsInfo'][tdf_data.analysis['DiaFrameMsMsInfo']['Frame'] ==
-                                                                          frame].to_dict(orient='records')[0]
-            diaframemsmswindows_dicts = tdf_data.analysis['DiaFrameMsMsWindows'][tdf_data.analysis['DiaFrameMsMsWindows']['WindowGroup'] ==
-                                                                                 diaframemsmsinfo_dict['WindowGroup']].to_dict(orient='records')
+        elif scan_mode == 9 and msms_type == 9:
+            diaframemsmsinfo_dict = tdf_data.diaframemsmsinfo_dict[frame]
+            diaframemsmswindows_dicts = tdf_data.diaframemsmswindows_dict.get(int(diaframemsmsinfo_dict['WindowGroup']),
+                                                                              [])
 
             for diaframemsmswindows_dict in diaframemsmswindows_dicts:
                 scan_dict = init_scan_dict()
                 scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
                                                                        frames_dict,
                                                                        mode,
-                                                                       exclude_mobility)
-
-                if not exclude_mobility:
-                    mz_array, intensity_array, mobility_array = extract_3d_tdf_spectrum(tdf_data,
-                                                                                        frame,
-                                                                                        int(diaframemsmswindows_dict['ScanNumBegin']),
-                                                                                        int(diaframemsmswindows_dict['ScanNumEnd']))
-                elif exclude_mobility:
-                    mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
-                                                                        mode,
-                                                                        frame,
-                                                                        int(diaframemsmswindows_dict['ScanNumBegin']),
-                                                                        int(diaframemsmswindows_dict['ScanNumEnd']),
-                                                                        profile_bins,
-                                                                        encoding)
-                if mz_array.size != 0 \
-                        and intensity_array.size != 0 \
-                        and mz_array.size == intensity_array.size \
-                        and mz_array is not None \
-                        and intensity_array is not None:
+                                                                       exclude_mobility,
+                                                                       centroided=centroided)
+
+                mz_array, intensity_array, mobility_array = extract_tdf_spectrum(tdf_data,
+                                                                                 mode,
+                                                                                 frame,
+                                                                                 int(diaframemsmswindows_dict['ScanNumBegin']),
+                                                                                 int(diaframemsmswindows_dict['ScanNumEnd']),
+                                                                                 exclude_mobility,
+                                                                                 profile_bins,
+                                                                                 encoding)
+                if is_valid_spectrum(mz_array, intensity_array):
                     scan_dict = populate_scan_dict_w_diapasef_ms2(scan_dict, diaframemsmswindows_dict)
                     scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-                    if not exclude_mobility and mobility_array.size != 0 and mobility_array is not None:
+                    if mobility_array is not None and mobility_array.size != 0:
                         scan_dict['mobility_array'] = mobility_array
                     list_of_parent_scans.append(scan_dict)
         # Parse frames with bbCID spectra.
-        elif int(frames_dict['ScanMode']) == 4 and int(frames_dict['MsMsType']) == 2:
+        elif scan_mode == 4 and msms_type == 2:
             scan_dict = init_scan_dict()
-            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility)
-            framemsmsinfo_dict = tdf_data.analysis['FrameMsMsInfo'][tdf_data.analysis['FrameMsMsInfo']['Frame'] ==
-                                                                    frame].to_dict(orient='records')[0]
+            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
+                                                                   frames_dict,
+                                                                   mode,
+                                                                   exclude_mobility,
+                                                                   centroided=centroided)
+            framemsmsinfo_dict = tdf_data.framemsmsinfo_dict[frame]
             scan_dict = populate_scan_dict_w_bbcid_iscid_ms2(scan_dict,
                                                              frame,
                                                              'TDF',
                                                              framemsmsinfo_dict=framemsmsinfo_dict)
-            if not exclude_mobility:
-                mz_array, intensity_array, mobility_array = extract_3d_tdf_spectrum(tdf_data,
-                                                                                    frame,
-                                                                                    0,
-                                                                                    int(frames_dict['NumScans']))
-            elif exclude_mobility:
-                mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
-                                                                    mode,
-                                                                    frame,
-                                                                    0,
-                                                                    int(frames_dict['NumScans']),
-                                                                    profile_bins,
-                                                                    encoding)
-            if mz_array.size != 0 \
-                    and intensity_array.size != 0 \
-                    and mz_array.size == intensity_array.size \
-                    and mz_array is not None \
-                    and intensity_array is not None:
+            mz_array, intensity_array, mobility_array = extract_tdf_spectrum(tdf_data,
+                                                                             mode,
+                                                                             frame,
+                                                                             0,
+                                                                             num_scans,
+                                                                             exclude_mobility,
+                                                                             profile_bins,
+                                                                             encoding)
+            if is_valid_spectrum(mz_array, intensity_array):
                 scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-                if not exclude_mobility and mobility_array.size != 0 and mobility_array is not None:
+                if mobility_array is not None and mobility_array.size != 0:
                     scan_dict['mobility_array'] = mobility_array
                 list_of_parent_scans.append(scan_dict)
         # Parse frames with MRM spectra.
-        elif int(frames_dict['ScanMode']) == 2 and int(frames_dict['MsMsType']) == 2:
+        elif scan_mode == 2 and msms_type == 2:
             scan_dict = init_scan_dict()
-            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility)
-            framemsmsinfo_dict = tdf_data.analysis['FrameMsMsInfo'][tdf_data.analysis['FrameMsMsInfo']['Frame'] ==
-                                                                    frame].to_dict(orient='records')[0]
+            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
+                                                                   frames_dict,
+                                                                   mode,
+                                                                   exclude_mobility,
+                                                                   centroided=centroided)
+            framemsmsinfo_dict = tdf_data.framemsmsinfo_dict[frame]
             mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
                                                                 mode,
                                                                 frame,
                                                                 0,
-                                                                int(frames_dict['NumScans']),
+                                                                num_scans,
                                                                 profile_bins,
                                                                 encoding)
-            if mz_array.size != 0 \
-                    and intensity_array.size != 0 \
-                    and mz_array.size == intensity_array.size \
-                    and mz_array is not None \
-                    and intensity_array is not None:
+            if is_valid_spectrum(mz_array, intensity_array):
                 # lcms set as False since MRM MS/MS spectra do not have a parent frame.
                 scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict, lcms=False)
                 scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
                 list_of_parent_scans.append(scan_dict)
         # Parse frames with prm-PASEF spectra.
-        elif int(frames_dict['ScanMode']) == 10 and int(frames_dict['MsMsType']) == 10:
+        elif scan_mode == 10 and msms_type == 10:
             scan_dict = init_scan_dict()
-            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict, frames_dict, mode, exclude_mobility)
-            prmframemsmsinfo_dict = tdf_data.analysis['PrmFrameMsMsInfo'][tdf_data.analysis['PrmFrameMsMsInfo']['Frame'] ==
-                                                                          frame].to_dict(orient='records')[0]
-            prmtargets_dict = tdf_data.analysis['PrmTargets'][tdf_data.analysis['PrmTargets']['Id'] ==
-                                                              int(prmframemsmsinfo_dict['Target'])].to_dict(orient='records')[0]
+            scan_dict = populate_scan_dict_w_lcms_tsf_tdf_metadata(scan_dict,
+                                                                   frames_dict,
+                                                                   mode,
+                                                                   exclude_mobility,
+                                                                   centroided=centroided)
+            prmframemsmsinfo_dict = tdf_data.prmframemsmsinfo_dict[frame]
+            prmtargets_dict = tdf_data.prmtargets_dict[int(prmframemsmsinfo_dict['Target'])]
             mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
                                                                 mode,
                                                                 frame,
@@ -990,11 +1291,7 @@ def parse_lcms_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_mo
                                                                 int(prmframemsmsinfo_dict['ScanNumEnd']),
                                                                 profile_bins,
                                                                 encoding)
-            if mz_array.size != 0 \
-                    and intensity_array.size != 0 \
-                    and mz_array.size == intensity_array.size \
-                    and mz_array is not None \
-                    and intensity_array is not None:
+            if is_valid_spectrum(mz_array, intensity_array):
                 scan_dict = populate_scan_dict_w_prmpasef_ms2(tdf_data,
                                                               scan_dict,
                                                               prmframemsmsinfo_dict,
@@ -1004,6 +1301,192 @@ def parse_lcms_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_mo
     return list_of_parent_scans, list_of_product_scans
 
 
+def parse_lcms_chunk(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding,
+                     executor=None):
+    """
+    Parse group of frames from LC-MS(/MS) data using timsconvert.parse.parse_lcms_tdf(),
+    timsconvert.parse.parse_lcms_tsf(), or timsconvert.parse.parse_lcms_baf() depending on the type of data.
+
+    :param data: Object containing raw data information from TDF, TSF, or BAF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData |
+        timsconvert.classes.TimsconvertBafData
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param executor: Thread pool passed to timsconvert.parse.parse_lcms_tdf() for TDF data, defaults to None.
+    :type executor: concurrent.futures.ThreadPoolExecutor | None
+    :return: Tuple of (list of dictionaries containing MS1 spectrum data, list of dictionaries containing MS/MS
+    spectrum data).
+    :rtype: tuple[list[dict]]
+    """
+    if isinstance(data, TimsconvertTdfData):
+        return parse_lcms_tdf(data,
+                              frame_start,
+                              frame_stop,
+                              mode,
+                              ms2_only,
+                              exclude_mobility,
+                              profile_bins,
+                              encoding,
+                              executor=executor)
+    elif isinstance(data, TimsconvertTsfData):
+        return parse_lcms_tsf(data, frame_start, frame_stop, mode, ms2_only, profile_bins, encoding)
+    elif isinstance(data, TimsconvertBafData):
+        return parse_lcms_baf(data, frame_start, frame_stop, mode, ms2_only, profile_bins, encoding)
+
+
+# Dataset opened by timsconvert.parse.init_parse_worker() in each worker process.
+PARSE_WORKER_DATA = None
+
+
+def init_parse_worker(data_class, bruker_d_folder_name, init_kwargs, worker_initializer=None):
+    """
+    Initialize a worker process used to parse frames in parallel. TDF-SDK and Baf2sql handles cannot be shared between
+    processes, so each worker initializes its own library and opens its own copy of the dataset, which is stored in
+    timsconvert.parse.PARSE_WORKER_DATA.
+
+    :param data_class: Class of the dataset opened in the main process.
+    :type data_class: type
+    :param bruker_d_folder_name: Path to the Bruker .d directory.
+    :type bruker_d_folder_name: str
+    :param init_kwargs: Keyword arguments used to open the dataset in the main process.
+    :type init_kwargs: dict
+    :param worker_initializer: Function without arguments that is called once the dataset has been opened, defaults to
+        None.
+    :type worker_initializer: function | None
+    """
+    global PARSE_WORKER_DATA
+    if issubclass(data_class, TimsconvertBafData):
+        library = init_baf2sql_api()
+    else:
+        library = init_tdf_sdk_api()
+    PARSE_WORKER_DATA = data_class(bruker_d_folder_name, library, **init_kwargs)
+    if worker_initializer is not None:
+        worker_initializer()
+
+
+def init_parse_process_pool(data, num_workers, worker_initializer=None):
+    """
+    Create a process pool whose workers each open their own copy of the dataset using
+    timsconvert.parse.init_parse_worker(). Workers are started with the "spawn" method on all platforms so that no
+    library handles are inherited from the main process.
+
+    :param data: Object containing raw data information from TDF, TSF, or BAF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData |
+        timsconvert.classes.TimsconvertBafData
+    :param num_workers: Number of worker processes.
+    :type num_workers: int
+    :param worker_initializer: Function without arguments that is called in each worker process once the dataset has
+        been opened (e.g. timsconvert.write.init_accelerated_encoding()), defaults to None.
+    :type worker_initializer: function | None
+    :return: Process pool to be passed to timsconvert.parse.parse_frames_in_worker() calls.
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(max_workers=num_workers,
+                               mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_parse_worker,
+                               initargs=(type(data), data.bruker_d_folder_name, data.init_kwargs, worker_initializer))
+
+
+def parse_frames_in_worker(parse_function, frame_start, frame_stop, *args):
+    """
+    Run a parse function (e.g. timsconvert.parse.parse_lcms_chunk()) on a group of frames using the dataset opened in
+    the current worker process by timsconvert.parse.init_parse_worker().
+
+    :param parse_function: Parse function that takes the dataset, frame_start, and frame_stop followed by *args.
+    :type parse_function: function
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param args: Remaining positional arguments passed to parse_function.
+    :return: Return value of parse_function.
+    """
+    return parse_function(PARSE_WORKER_DATA, frame_start, frame_stop, *args)
+
+
+def run_in_worker(function, *args):
+    """
+    Run a function that takes the dataset as its first argument (e.g. timsconvert.write.write_maldi_dd_sample_mzml())
+    using the dataset opened in the current worker process by timsconvert.parse.init_parse_worker().
+
+    :param function: Function that takes the dataset followed by *args.
+    :type function: function
+    :param args: Remaining positional arguments passed to function.
+    :return: Return value of function.
+    """
+    return function(PARSE_WORKER_DATA, *args)
+
+
+def split_frame_range(frame_start, frame_stop, frames_per_task):
+    """
+    Split a range of frames into consecutive ranges of at most frames_per_task frames to be parsed by separate worker
+    processes.
+
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param frames_per_task: Maximum number of frames in each range.
+    :type frames_per_task: int
+    :return: List of (frame_start, frame_stop) tuples.
+    :rtype: list[tuple[int]]
+    """
+    return [(i, min(i + frames_per_task, frame_stop)) for i in range(frame_start, frame_stop, frames_per_task)]
+
+
+def parse_frame_ranges_in_parallel(process_pool, parse_function, frame_ranges, *args, max_pending_tasks):
+    """
+    Parse a list of frame ranges with the worker processes of a process pool from
+    timsconvert.parse.init_parse_process_pool() using timsconvert.parse.parse_frames_in_worker(). Unlike
+    concurrent.futures.ProcessPoolExecutor.map(), which submits every frame range at once and holds on to all results
+    that have not been consumed yet, at most max_pending_tasks frame ranges are submitted ahead of the consumer, so the
+    number of parsed spectra held in memory does not depend on the size of the dataset. Tasks that have not started
+    yet are cancelled if the consumer stops early.
+
+    :param process_pool: Process pool from timsconvert.parse.init_parse_process_pool().
+    :type process_pool: concurrent.futures.ProcessPoolExecutor
+    :param parse_function: Parse function that takes the dataset, frame_start, and frame_stop followed by *args.
+    :type parse_function: function
+    :param frame_ranges: List of (frame_start, frame_stop) tuples.
+    :type frame_ranges: list[tuple[int]]
+    :param args: Remaining positional arguments passed to parse_function.
+    :param max_pending_tasks: Maximum number of frame ranges that are submitted but not yet consumed, e.g. twice the
+        number of worker processes to keep every worker busy while the results of the previous ones are consumed.
+    :type max_pending_tasks: int
+    :return: Generator yielding the return values of parse_function in the same order as frame_ranges.
+    :rtype: collections.abc.Generator
+    """
+    frame_ranges = iter(frame_ranges)
+    futures = collections.deque()
+    try:
+        for frame_start, frame_stop in itertools.islice(frame_ranges, max_pending_tasks):
+            futures.append(process_pool.submit(parse_frames_in_worker, parse_function, frame_start, frame_stop, *args))
+        while futures:
+            result = futures.popleft().result()
+            for frame_start, frame_stop in itertools.islice(frame_ranges, 1):
+                futures.append(process_pool.submit(parse_frames_in_worker,
+                                                   parse_function,
+                                                   frame_start,
+                                                   frame_stop,
+                                                   *args))
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 def parse_maldi_plate_map(plate_map_filename):
     """
     Parse a MALDI plate map from a CSV file without a column header or row index.
@@ -1013,12 +1496,11 @@ def parse_maldi_plate_map(plate_map_filename):
     :return: Dictionary containing standard MTP spot names as the key and spot label/category/condition as the value.
     :rtype: dict
     """
-    plate_map = pd.read_csv(plate_map_filename, header=None)
-    plate_dict = {}
-    for index, row in plate_map.iterrows():
-        for count, value in enumerate(row, start=1):
-            plate_dict[chr(index + 65) + str(count)] = value
-    return plate_dict
+    plate_map = pd.read_csv(plate_map_filename, header=None).to_numpy()
+    # Spot names are the row letter followed by the 1-based column number (e.g. "A1"), in row-major order.
+    spot_names = np.char.add(np.array([chr(index + 65) for index in range(plate_map.shape[0])])[:, None],
+                             np.arange(1, plate_map.shape[1] + 1).astype(str)[None, :])
+    return dict(zip(spot_names.ravel().tolist(), plate_map.ravel().tolist()))
 
 
 def parse_maldi_tsf(tsf_data, frame_start, frame_stop, mode, ms2_only, profile_bins, encoding):
@@ -1040,36 +1522,44 @@ def parse_maldi_tsf(tsf_data, frame_start, frame_stop, mode, ms2_only, profile_b
     :type profile_bins: int
     :param encoding: Encoding command line parameter, either "64" or "32".
     :type encoding: int
-    :return: List of dictionaries containing spectrum data.
-    :rtype: list[dict]
+    :return: Generator yielding dictionaries containing spectrum data, one frame at a time.
+    :rtype: collections.abc.Iterator[dict]
     """
-    list_of_scan_dicts = []
+    centroided = get_centroid_status(mode)[0]
+    maldi_scan_dict = init_maldi_scan_dict(mode, centroided=centroided)
+    dtype = get_encoding_dtype(encoding)
 
     for frame in range(frame_start, frame_stop):
-        scan_dict = init_scan_dict()
-        frames_dict = tsf_data.analysis['Frames'][tsf_data.analysis['Frames']['Id'] ==
-                                                  frame].to_dict(orient='records')[0]
-        maldiframeinfo_dict = tsf_data.analysis['MaldiFrameInfo'][tsf_data.analysis['MaldiFrameInfo']['Frame'] ==
-                                                                  frame].to_dict(orient='records')[0]
-        scan_dict = populate_scan_dict_w_maldi_metadata(scan_dict,
-                                                        tsf_data,
-                                                        frames_dict,
-                                                        maldiframeinfo_dict,
-                                                        frame,
-                                                        mode)
+        frames_dict = tsf_data.frames_dict[frame]
+        msms_type = int(frames_dict['MsMsType'])
+        # Skip frames that are not written out before reading their metadata and spectrum.
+        if msms_type in MSMS_TYPE_CATEGORY['ms1']:
+            if ms2_only:
+                continue
+        elif msms_type not in MSMS_TYPE_CATEGORY['ms2']:
+            continue
 
         mz_array, intensity_array = extract_tsf_spectrum(tsf_data, mode, frame, profile_bins, encoding)
-        if mz_array.size != 0 and intensity_array.size != 0 and mz_array.size == intensity_array.size:
-            scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-            if int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms1'] and not ms2_only:
-                scan_dict = populate_scan_dict_w_ms1(scan_dict, frame)
-                list_of_scan_dicts.append(scan_dict)
-            elif int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms2']:
-                framemsmsinfo_dict = tsf_data.analysis['FrameMsMsInfo'][tsf_data.analysis['FrameMsMsInfo']['Frame'] ==
-                                                                        maldiframeinfo_dict['Frame']].to_dict(orient='records')[0]
-                scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict)
-                list_of_scan_dicts.append(scan_dict)
-    return list_of_scan_dicts
+        # Metadata is only read for frames with a spectrum to write.
+        if not is_valid_spectrum(mz_array, intensity_array):
+            continue
+        maldiframeinfo_dict = tsf_data.maldiframeinfo_dict[frame]
+        scan_dict = populate_scan_dict_w_maldi_frame_metadata(maldi_scan_dict.copy(),
+                                                              tsf_data,
+                                                              frames_dict,
+                                                              maldiframeinfo_dict,
+                                                              frame)
+        scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
+        # All spectra are held in memory until written, so arrays are stored in the dtype they are encoded with
+        # in the output file; summary values above are calculated from the original arrays.
+        scan_dict['mz_array'] = mz_array.astype(dtype, copy=False)
+        scan_dict['intensity_array'] = intensity_array.astype(dtype, copy=False)
+        if msms_type in MSMS_TYPE_CATEGORY['ms1']:
+            scan_dict = populate_scan_dict_w_ms1(scan_dict, frame)
+        else:
+            framemsmsinfo_dict = tsf_data.framemsmsinfo_dict[int(maldiframeinfo_dict['Frame'])]
+            scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict)
+        yield scan_dict
 
 
 def parse_maldi_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding):
@@ -1093,77 +1583,161 @@ def parse_maldi_tdf(tdf_data, frame_start, frame_stop, mode, ms2_only, exclude_m
     :type profile_bins: int
     :param encoding: Encoding command line parameter, either "64" or "32".
     :type encoding: int
-    :return: List of dictionaries containing spectrum data.
-    :rtype: list[dict]
+    :return: Generator yielding dictionaries containing spectrum data, one frame at a time.
+    :rtype: collections.abc.Iterator[dict]
     """
-    list_of_scan_dicts = []
-    exclude_mobility = get_centroid_status(mode, exclude_mobility)[1]
+    centroided, exclude_mobility = get_centroid_status(mode, exclude_mobility)
+    maldi_scan_dict = init_maldi_scan_dict(mode, centroided=centroided)
+    dtype = get_encoding_dtype(encoding)
 
     for frame in range(frame_start, frame_stop):
-        scan_dict = init_scan_dict()
-        frames_dict = tdf_data.analysis['Frames'][tdf_data.analysis['Frames']['Id'] ==
-                                                  frame].to_dict(orient='records')[0]
-        maldiframeinfo_dict = tdf_data.analysis['MaldiFrameInfo'][tdf_data.analysis['MaldiFrameInfo']['Frame'] ==
-                                                                  frame].to_dict(orient='records')[0]
-
-        scan_dict = populate_scan_dict_w_maldi_metadata(scan_dict,
-                                                        tdf_data,
-                                                        frames_dict,
-                                                        maldiframeinfo_dict,
-                                                        frame,
-                                                        mode)
-
-        if int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms1'] and not ms2_only:
+        frames_dict = tdf_data.frames_dict[frame]
+        msms_type = int(frames_dict['MsMsType'])
+        # Skip frames that are not written out before reading their metadata and spectrum.
+        if msms_type in MSMS_TYPE_CATEGORY['ms1']:
+            if ms2_only:
+                continue
+        elif msms_type not in MSMS_TYPE_CATEGORY['ms2']:
+            continue
+
+        mz_array, intensity_array, mobility_array = extract_tdf_spectrum(tdf_data,
+                                                                         mode,
+                                                                         frame,
+                                                                         0,
+                                                                         int(frames_dict['NumScans']),
+                                                                         exclude_mobility,
+                                                                         profile_bins,
+                                                                         encoding)
+        # Metadata is only read for frames with a spectrum to write.
+        if not is_valid_spectrum(mz_array, intensity_array):
+            continue
+        maldiframeinfo_dict = tdf_data.maldiframeinfo_dict[frame]
+        scan_dict = populate_scan_dict_w_maldi_frame_metadata(maldi_scan_dict.copy(),
+                                                              tdf_data,
+                                                              frames_dict,
+                                                              maldiframeinfo_dict,
+                                                              frame)
+        scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
+        # All spectra are held in memory until written, so arrays are stored in the dtype they are encoded with
+        # in the output file; summary values above are calculated from the original arrays.
+        scan_dict['mz_array'] = mz_array.astype(dtype, copy=False)
+        scan_dict['intensity_array'] = intensity_array.astype(dtype, copy=False)
+        # mobility_array is None if mobility data is excluded.
+        if mobility_array is not None and mobility_array.size != 0:
+            scan_dict['mobility_array'] = mobility_array.astype(dtype, copy=False)
+        if msms_type in MSMS_TYPE_CATEGORY['ms1']:
             scan_dict['scan_type'] = 'MS1 spectrum'
             scan_dict['ms_level'] = 1
-            if not exclude_mobility:
-                mz_array, intensity_array, mobility_array = extract_3d_tdf_spectrum(tdf_data,
-                                                                                    frame,
-                                                                                    0,
-                                                                                    int(frames_dict['NumScans']))
-            elif exclude_mobility:
-                mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
-                                                                    mode,
-                                                                    frame,
-                                                                    0,
-                                                                    int(frames_dict['NumScans']),
-                                                                    profile_bins,
-                                                                    encoding)
-
-            if mz_array.size != 0 \
-                    and intensity_array.size != 0 \
-                    and mz_array.size == intensity_array.size \
-                    and mz_array is not None \
-                    and intensity_array is not None:
-                scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-                if not exclude_mobility and mobility_array.size != 0 and mobility_array is not None:
-                    scan_dict['mobility_array'] = mobility_array
-                list_of_scan_dicts.append(scan_dict)
-        elif int(frames_dict['MsMsType']) in MSMS_TYPE_CATEGORY['ms2']:
-            framemsmsinfo_dict = tdf_data.analysis['FrameMsMsInfo'][tdf_data.analysis['FrameMsMsInfo']['Frame'] ==
-                                                                    maldiframeinfo_dict['Frame']].to_dict(orient='records')[0]
-            if not exclude_mobility:
-                mz_array, intensity_array, mobility_array = extract_3d_tdf_spectrum(tdf_data,
-                                                                                    frame,
-                                                                                    0,
-                                                                                    int(frames_dict['NumScans']))
-            elif exclude_mobility:
-                mz_array, intensity_array = extract_2d_tdf_spectrum(tdf_data,
-                                                                    mode,
-                                                                    frame,
-                                                                    0,
-                                                                    int(frames_dict['NumScans']),
-                                                                    profile_bins,
-                                                                    encoding)
-
-            if mz_array.size != 0 \
-                    and intensity_array.size != 0 \
-                    and mz_array.size == intensity_array.size \
-                    and mz_array is not None \
-                    and intensity_array is not None:
-                scan_dict = populate_scan_dict_w_spectrum_data(scan_dict, mz_array, intensity_array)
-                if not exclude_mobility and mobility_array.size != 0 and mobility_array is not None:
-                    scan_dict['mobility_array'] = mobility_array
-                scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict)
-                list_of_scan_dicts.append(scan_dict)
-    return list_of_scan_dicts
+        else:
+            framemsmsinfo_dict = tdf_data.framemsmsinfo_dict[int(maldiframeinfo_dict['Frame'])]
+            scan_dict = populate_scan_dict_w_tsf_ms2(scan_dict, framemsmsinfo_dict)
+        yield scan_dict
+
+
+def parse_maldi_chunk(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding):
+    """
+    Parse group of frames from MALDI-MS(/MS) data using timsconvert.parse.parse_maldi_tsf() or
+    timsconvert.parse.parse_maldi_tdf() depending on the type of data.
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool | None
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :return: Generator yielding dictionaries containing spectrum data, one frame at a time.
+    :rtype: collections.abc.Iterator[dict]
+    """
+    if isinstance(data, TimsconvertTsfData):
+        return parse_maldi_tsf(data, frame_start, frame_stop, mode, ms2_only, profile_bins, encoding)
+    elif isinstance(data, TimsconvertTdfData):
+        return parse_maldi_tdf(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding)
+
+
+def parse_maldi_chunk_to_list(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins,
+                              encoding):
+    """
+    Parse group of frames from MALDI-MS(/MS) data using timsconvert.parse.parse_maldi_chunk() and collect the results
+    in a list. Used to return the results from worker processes, since generators cannot be sent between processes.
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool | None
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :return: List of dictionaries containing spectrum data.
+    :rtype: list[dict]
+    """
+    return list(parse_maldi_chunk(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins,
+                                  encoding))
+
+
+def parse_maldi_frames(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins, encoding,
+                       process_pool=None, frames_per_task=64, num_workers=1):
+    """
+    Parse a range of frames from MALDI-MS(/MS) data using timsconvert.parse.parse_maldi_chunk(). If a process pool
+    from timsconvert.parse.init_parse_process_pool() is provided, the range is split into groups of frames_per_task
+    frames that are parsed in parallel by the worker processes.
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool | None
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param process_pool: Process pool used to parse frames in parallel, defaults to None.
+    :type process_pool: concurrent.futures.ProcessPoolExecutor | None
+    :param frames_per_task: Number of frames parsed by a worker process at a time, defaults to 64.
+    :type frames_per_task: int
+    :param num_workers: Number of worker processes in process_pool, defaults to 1.
+    :type num_workers: int
+    :return: Generator yielding dictionaries containing spectrum data in frame order.
+    :rtype: collections.abc.Iterator[dict]
+    """
+    if process_pool is None:
+        yield from parse_maldi_chunk(data, frame_start, frame_stop, mode, ms2_only, exclude_mobility, profile_bins,
+                                     encoding)
+    else:
+        for list_of_scan_dicts in parse_frame_ranges_in_parallel(process_pool,
+                                                                 parse_maldi_chunk_to_list,
+                                                                 split_frame_range(frame_start,
+                                                                                   frame_stop,
+                                                                                   frames_per_task),
+                                                                 mode,
+                                                                 ms2_only,
+                                                                 exclude_mobility,
+                                                                 profile_bins,
+                                                                 encoding,
+                                                                 max_pending_tasks=2 * num_workers):
+            yield from list_of_scan_dicts
@@ -1,11 +1,60 @@
 from timsconvert.parse import *
 from timsconvert.classes import *
 import os
+import collections
+import hashlib
+import itertools
 import logging
+import queue
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from psims.mzml import MzMLWriter
+from psims.mzml import binary_encoding as psims_binary_encoding
 from pyimzml.ImzMLWriter import ImzMLWriter
+from pyimzml import compression as pyimzml_compression
 from pyimzml.compression import NoCompression, ZlibCompression
+# Whether timsconvert.write.init_accelerated_encoding() has been called in this process.
+ACCELERATED_ENCODING = False
+
+
+def init_accelerated_encoding():
+    """
+    Use faster drop-in replacements for the zlib and base64 modules to encode binary data arrays if they are installed:
+    zlib-ng (or ISA-L if zlib-ng is not installed) for zlib compressed arrays written by psims and pyimzML, and
+    pybase64 for base64 encoded arrays written by psims. Their output can be read back with the standard zlib and
+    base64 modules. This replaces the modules used by psims.mzml.binary_encoding and pyimzml.compression for the whole
+    process, so it is only called explicitly (e.g. from bin/run.py and in worker processes that write mzML files) and
+    never on import. The backends that are used are logged.
+
+    :return: Dictionary with the names of the modules used for zlib compression ("zlib") and base64 encoding
+        ("base64").
+    :rtype: dict
+    """
+    global ACCELERATED_ENCODING
+    ACCELERATED_ENCODING = True
+    backends = {'zlib': 'zlib', 'base64': 'base64'}
+    try:
+        from zlib_ng import zlib_ng as accelerated_zlib
+        backends['zlib'] = 'zlib-ng'
+    except ImportError:
+        try:
+            from isal import isal_zlib as accelerated_zlib
+            backends['zlib'] = 'ISA-L'
+        except ImportError:
+            accelerated_zlib = None
+    if accelerated_zlib is not None:
+        psims_binary_encoding.zlib = accelerated_zlib
+        pyimzml_compression.zlib = accelerated_zlib
+    try:
+        import pybase64
+        psims_binary_encoding.base64 = pybase64
+        backends['base64'] = 'pybase64'
+    except ImportError:
+        pass
+    logging.info(get_timestamp() + ':' + 'Using ' + backends['zlib'] + ' for zlib compression and ' +
+                 backends['base64'] + ' for base64 encoding...')
+    return backends
 
 
 def write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata):
@@ -95,7 +144,7 @@ def write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata
         source = writer.Source(inst_count,
                                [INSTRUMENT_SOURCE_TYPE[data.analysis[metadata_key]['InstrumentSourceType']]])
     # If source isn't found in the GlobalMetadata SQL table, hard code source to ESI
-    elif 'MaldiApplicationType' in data.analysis[metadata_key].keys():
+    elif 'MaldiApplicationType' in data.analysis[metadata_key]:
         source = writer.Source(inst_count, ['matrix-assisted laser desorption ionization'])
 
     # Analyzer and detector hard coded for timsTOF fleX
@@ -126,9 +175,10 @@ def get_spectra_count(data):
     :rtype: int
     """
     if isinstance(data, TimsconvertTdfData):
-        ms1_count = data.analysis['Frames'][data.analysis['Frames']['MsMsType'] == 0]['MsMsType'].values.size
+        ms1_count = int(np.count_nonzero(data.analysis['Frames']['MsMsType'].values == 0))
         if 'Precursors' in data.analysis.keys():
-            ms2_count = len(list(filter(None, data.analysis['Precursors']['MonoisotopicMz'].values)))
+            # Counts the same truthy values as filter(None, ...) without building a list.
+            ms2_count = int(np.count_nonzero(data.analysis['Precursors']['MonoisotopicMz'].values))
         # Set ms2_count to 0 if precursors table is not found.
         else:
             ms2_count = 0
@@ -136,19 +186,63 @@ def get_spectra_count(data):
     elif isinstance(data, TimsconvertTsfData):
         ms_count = data.analysis['Frames'].shape[0]
     elif isinstance(data, TimsconvertBafData):
-        ms1_count = data.analysis['Spectra'][data.analysis['Spectra']['AcquisitionKey'] ==
-                                             1]['AcquisitionKey'].values.size
-        ms2_count = data.analysis['Spectra'][data.analysis['Spectra']['AcquisitionKey'] ==
-                                             2]['AcquisitionKey'].values.size
+        acquisition_keys = data.analysis['Spectra']['AcquisitionKey'].values
+        ms1_count = int(np.count_nonzero(acquisition_keys == 1))
+        ms2_count = int(np.count_nonzero(acquisition_keys == 2))
         ms_count = ms1_count + ms2_count
     return ms_count
 
 
+def format_spectra_count(num_of_spectra):
+    """
+    Format a spectra count for the spectrumList count attribute. The count is zero padded to a fixed width so that it
+    can be overwritten in place once the true number of written spectra is known.
+
+    :param num_of_spectra: Number of spectra.
+    :type num_of_spectra: int
+    :return: Zero padded spectra count.
+    :rtype: str
+    """
+    return str(num_of_spectra).zfill(12)
+
+
+def update_file_checksum(mzml_file):
+    """
+    Recalculate the SHA-1 checksum in the fileChecksum element of an indexed mzML file after the file has been
+    modified in place. As written by psims, the checksum covers every byte of the file up to and including the
+    opening fileChecksum tag, and the element is the last one before the closing indexedmzML tag.
+
+    :param mzml_file: Indexed mzML file opened in "r+b" mode.
+    :type mzml_file: io.BufferedRandom
+    """
+    checksum_tag = b'<fileChecksum>'
+    mzml_file.seek(0, os.SEEK_END)
+    tail_offset = max(0, mzml_file.tell() - 4096)
+    mzml_file.seek(tail_offset)
+    index = mzml_file.read().rfind(checksum_tag)
+    if index == -1:
+        return
+    checksum_offset = tail_offset + index + len(checksum_tag)
+    checksum = hashlib.sha1()
+    mzml_file.seek(0)
+    remaining = checksum_offset
+    while remaining > 0:
+        block = mzml_file.read(min(remaining, 1024 * 1024))
+        if not block:
+            break
+        checksum.update(block)
+        remaining -= len(block)
+    mzml_file.seek(checksum_offset)
+    mzml_file.write(checksum.hexdigest().encode())
+
+
 def update_spectra_count(outdir, outfile, num_of_spectra, scan_count):
     """
     Calculate the actual number of spectra that were written to the output mzML file. Update is needed to prevent
-    counting emtpy spectra that were omitted from the output. Performs this by iterating over tmp mzML file that was
-    written and replacing the tmp file with a final mzML file with a true spectra count.
+    counting emtpy spectra that were omitted from the output. Performs this by overwriting the zero padded count
+    written by timsconvert.write.format_spectra_count() in the tmp mzML file, recalculating the file checksum using
+    timsconvert.write.update_file_checksum(), and renaming the tmp file to the final mzML file. If the counts are
+    identical, the tmp file is only renamed.
 
     :param outdir: Output directory path that was specified from the command line parameters or the original input
         file path if no output directory was specified.
@@ -162,14 +256,45 @@ def update_spectra_count(outdir, outfile, num_of_spectra, scan_count):
     :param scan_count: Final true count for the number of spectra from the current file being converted.
     :type scan_count: int
     """
-    if os.path.exists(os.path.join(outdir, outfile)):
-        os.remove(os.path.join(outdir, outfile))
-    with open(os.path.splitext(os.path.join(outdir, outfile))[0] + '_tmp.mzML', 'r') as in_stream, \
-            open(os.path.join(outdir, outfile), 'w') as out_stream:
-        for line in in_stream:
-            out_stream.write(line.replace('      <spectrumList count="' + str(num_of_spectra) + '" defaultDataProcessingRef="exportation">',
-                                          '      <spectrumList count="' + str(scan_count) + '" defaultDataProcessingRef="exportation">'))
-    os.remove(os.path.splitext(os.path.join(outdir, outfile))[0] + '_tmp.mzML')
+    mzml_filename = os.path.join(outdir, outfile)
+    tmp_filename = os.path.splitext(mzml_filename)[0] + '_tmp.mzML'
+    if num_of_spectra != scan_count:
+        count_attribute = ('<spectrumList count="' + format_spectra_count(num_of_spectra) + '"').encode()
+        # The spectrumList element follows the run metadata near the start of the file, so only the first blocks are
+        # read.
+        with open(tmp_filename, 'r+b') as mzml_file:
+            offset = 0
+            head = b''
+            while True:
+                block = mzml_file.read(1024 * 1024)
+                head += block
+                index = head.find(count_attribute)
+                if index != -1 or not block:
+                    break
+                # Keep the tail in case the attribute spans two blocks.
+                offset += len(head) - len(count_attribute)
+                head = head[-len(count_attribute):]
+            if index != -1:
+                mzml_file.seek(offset + index + len('<spectrumList count="'))
+                mzml_file.write(format_spectra_count(scan_count).encode())
+                # The checksum written by psims covers the old count.
+                update_file_checksum(mzml_file)
+    if os.path.exists(mzml_filename):
+        os.remove(mzml_filename)
+    os.rename(tmp_filename, mzml_filename)
+
+
+def init_mzml_writer(filename):
+    """
+    Initialize a psims writer for an mzML output file.
+
+    :param filename: Path to the output file.
+    :type filename: str
+    :return: Writer for the output file.
+    :rtype: psims.mzml.MzMLWriter
+    """
+    # A large write buffer lets the many small XML fragments written per spectrum reach the disk in big blocks.
+    return MzMLWriter(open(filename, 'wb', buffering=16 * 1024 * 1024), close=True)
 
 
 def write_ms1_spectrum(writer, data, scan, encoding, compression, title=None):
@@ -202,7 +327,7 @@ def write_ms1_spectrum(writer, data, scan, encoding, compression, title=None):
               {'base peak intensity': scan['base_peak_intensity']},
               {'highest observed m/z': scan['high_mz']},
               {'lowest observed m/z': scan['low_mz']}]
-    if 'MaldiApplicationType' in data.analysis[metadata_key].keys():
+    if 'MaldiApplicationType' in data.analysis[metadata_key]:
         params.append({'maldi spot identifier': scan['coord']})
         params.append({'spectrum title': title})
     if scan['ms2_no_precursor']:
@@ -219,10 +344,7 @@ def write_ms1_spectrum(writer, data, scan, encoding, compression, title=None):
     else:
         other_arrays = None
 
-    encoding_dict = {'m/z array': get_encoding_dtype(encoding),
-                     'intensity array': get_encoding_dtype(encoding)}
-    if other_arrays is not None:
-        encoding_dict['mean inverse reduced ion mobility array'] = get_encoding_dtype(encoding)
+    encoding_dict = SPECTRUM_ENCODING[encoding]
 
     writer.write_spectrum(scan['mz_array'],
                           scan['intensity_array'],
@@ -265,12 +387,13 @@ def write_ms2_spectrum(writer, data, scan, encoding, compression, parent_scan=No
     params = [scan['scan_type'],
               {'ms level': scan['ms_level']},
               {'total ion current': scan['total_ion_current']}]
-    if 'MaldiApplicationType' in data.analysis[metadata_key].keys():
+    if 'MaldiApplicationType' in data.analysis[metadata_key]:
         params.append({'spectrum title': title})
-    if 'base_peak_mz' in scan.keys() and 'base_peak_intensity' in scan.keys():
+    # Summary values are only None if no spectrum data was populated.
+    if scan.get('base_peak_mz') is not None:
         params.append({'base peak m/z': scan['base_peak_mz']})
         params.append({'base peak intensity': scan['base_peak_intensity']})
-    if 'high_mz' in scan.keys() and 'low_mz' in scan.keys():
+    if scan.get('high_mz') is not None:
         params.append({'highest observed m/z': scan['high_mz']})
         params.append({'lowest observed m/z': scan['low_mz']})
 
@@ -285,10 +408,7 @@ def write_ms2_spectrum(writer, data, scan, encoding, compression, parent_scan=No
     else:
         other_arrays = None
 
-    encoding_dict = {'m/z array': get_encoding_dtype(encoding),
-                     'intensity array': get_encoding_dtype(encoding)}
-    if other_arrays is not None:
-        encoding_dict['mean inverse reduced ion mobility array'] = get_encoding_dtype(encoding)
+    encoding_dict = SPECTRUM_ENCODING[encoding]
 
     # Build precursor information dict.
     precursor_info = {'mz': scan['selected_ion_mz'],
@@ -304,10 +424,8 @@ def write_ms2_spectrum(writer, data, scan, encoding, compression, parent_scan=No
         precursor_info['params'].append({'inverse reduced ion mobility': scan['selected_ion_mobility']})
     if scan['selected_ion_ccs'] is not None:
         precursor_info['params'].append({'collisional cross sectional area': scan['selected_ion_ccs']})
-    if scan['charge_state'] is not None and \
-            not np.isnan(scan['charge_state']):
-        if int(scan['charge_state']) != 0:
-            precursor_info['charge'] = scan['charge_state']
+    if scan['charge_state'] is not None:
+        precursor_info['charge'] = scan['charge_state']
 
     if parent_scan is not None:
         precursor_info['spectrum_reference'] = 'scan=' + str(parent_scan['scan_number'])
@@ -326,30 +444,23 @@ def write_ms2_spectrum(writer, data, scan, encoding, compression, parent_scan=No
                           compression=compression)
 
 
-def write_lcms_chunk_to_mzml(data, writer, frame_start, frame_stop, scan_count, mode, ms2_only, exclude_mobility,
-                             profile_bins, encoding, compression):
+def write_lcms_scans_to_mzml(data, writer, parent_scans, product_scans, scan_count, ms2_only, encoding, compression):
     """
-    Parse and write out a group of spectra to an mzML file from an LC-MS(/MS) dataset using psims.
+    Write out a group of parsed spectra to an mzML file from an LC-MS(/MS) dataset using psims.
 
     :param data: Object containing raw data information from TDF, TSF, or BAF file.
     :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData |
         timsconvert.classes.TimsconvertBafData
     :param writer: Instance of psims.mzml.MzMLWriter for output file.
     :type writer: psims.mzml.MzMLWriter
-    :param frame_start: Beginning frame number.
-    :type frame_start: int
-    :param frame_stop: Ending frame number (non-inclusive).
-    :type frame_stop: int
+    :param parent_scans: List of dictionaries containing MS1 spectrum data.
+    :type parent_scans: list[dict]
+    :param product_scans: List of dictionaries containing MS/MS spectrum data.
+    :type product_scans: list[dict]
     :param scan_count: Current count for the number of spectra from the current file that have been converted.
     :type scan_count: int
-    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
-    :type mode: str
     :param ms2_only: Whether to include MS1 data in the output files.
     :type ms2_only: bool
-    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
-    :type exclude_mobility: bool
-    :param profile_bins: Number of bins to bin spectrum to.
-    :type profile_bins: int
     :param encoding: Encoding command line parameter, either "64" or "32".
     :type encoding: int
     :param compression: Compression command line parameter, either "zlib" or "none".
@@ -357,39 +468,14 @@ def write_lcms_chunk_to_mzml(data, writer, frame_start, frame_stop, scan_count,
     :return: Updated count for the number of spectra from the current file that have been converted.
     :rtype: int
     """
-    # Parse TDF data
-    if isinstance(data, TimsconvertTdfData):
-        parent_scans, product_scans = parse_lcms_tdf(data,
-                                                     frame_start,
-                                                     frame_stop,
-                                                     mode,
-                                                     ms2_only,
-                                                     exclude_mobility,
-                                                     profile_bins,
-                                                     encoding)
-    # Parse TSF data
-    elif isinstance(data, TimsconvertTsfData):
-        parent_scans, product_scans = parse_lcms_tsf(data,
-                                                     frame_start,
-                                                     frame_stop,
-                                                     mode,
-                                                     ms2_only,
-                                                     profile_bins,
-                                                     encoding)
-    # Parse BAF data
-    elif isinstance(data, TimsconvertBafData):
-        parent_scans, product_scans = parse_lcms_baf(data,
-                                                     frame_start,
-                                                     frame_stop,
-                                                     mode,
-                                                     ms2_only,
-                                                     profile_bins,
-                                                     encoding)
-
     # Write MS1 parent scans.
     if not ms2_only and product_scans != []:
+        # Group product scans by parent frame once instead of filtering the whole list for every parent.
+        products_dict = {}
+        for product in product_scans:
+            products_dict.setdefault(product['parent_frame'], []).append(product)
         for parent in parent_scans:
-            products = [i for i in product_scans if i['parent_frame'] == parent['frame']]
+            products = products_dict.get(parent['frame'], [])
             # Set params for scan.
             scan_count += 1
             parent['scan_number'] = scan_count
@@ -418,8 +504,120 @@ def write_lcms_chunk_to_mzml(data, writer, frame_start, frame_stop, scan_count,
     return scan_count
 
 
+def write_lcms_chunk_to_mzml(data, writer, frame_start, frame_stop, scan_count, mode, ms2_only, exclude_mobility,
+                             profile_bins, encoding, compression, executor=None):
+    """
+    Parse and write out a group of spectra to an mzML file from an LC-MS(/MS) dataset using psims.
+
+    :param data: Object containing raw data information from TDF, TSF, or BAF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData |
+        timsconvert.classes.TimsconvertBafData
+    :param writer: Instance of psims.mzml.MzMLWriter for output file.
+    :type writer: psims.mzml.MzMLWriter
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param scan_count: Current count for the number of spectra from the current file that have been converted.
+    :type scan_count: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param compression: Compression command line parameter, either "zlib" or "none".
+    :type compression: str
+    :param executor: Thread pool passed to timsconvert.parse.parse_lcms_tdf() for TDF data, defaults to None.
+    :type executor: concurrent.futures.ThreadPoolExecutor | None
+    :return: Updated count for the number of spectra from the current file that have been converted.
+    :rtype: int
+    """
+    parent_scans, product_scans = parse_lcms_chunk(data,
+                                                   frame_start,
+                                                   frame_stop,
+                                                   mode,
+                                                   ms2_only,
+                                                   exclude_mobility,
+                                                   profile_bins,
+                                                   encoding,
+                                                   executor=executor)
+    return write_lcms_scans_to_mzml(data, writer, parent_scans, product_scans, scan_count, ms2_only, encoding,
+                                    compression)
+
+
+def write_lcms_chunk_list_to_mzml(data, writer, chunk_list, scan_count, mode, ms2_only, exclude_mobility, profile_bins,
+                                  encoding, compression, executor=None, process_pool=None, num_workers=1):
+    """
+    Parse and write out a list of frame ranges to an mzML file from an LC-MS(/MS) dataset using psims. If a process
+    pool from timsconvert.parse.init_parse_process_pool() is provided, the frame ranges are parsed in parallel by the
+    worker processes and written out in their original order.
+
+    :param data: Object containing raw data information from TDF, TSF, or BAF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData |
+        timsconvert.classes.TimsconvertBafData
+    :param writer: Instance of psims.mzml.MzMLWriter for output file.
+    :type writer: psims.mzml.MzMLWriter
+    :param chunk_list: List of (frame_start, frame_stop) tuples.
+    :type chunk_list: list[tuple[int]]
+    :param scan_count: Current count for the number of spectra from the current file that have been converted.
+    :type scan_count: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param compression: Compression command line parameter, either "zlib" or "none".
+    :type compression: str
+    :param executor: Thread pool passed to timsconvert.parse.parse_lcms_tdf() for TDF data, defaults to None.
+    :type executor: concurrent.futures.ThreadPoolExecutor | None
+    :param process_pool: Process pool used to parse frame ranges in parallel, defaults to None.
+    :type process_pool: concurrent.futures.ProcessPoolExecutor | None
+    :param num_workers: Number of worker processes in process_pool, defaults to 1.
+    :type num_workers: int
+    :return: Updated count for the number of spectra from the current file that have been converted.
+    :rtype: int
+    """
+    if process_pool is None:
+        for frame_start, frame_stop in chunk_list:
+            scan_count = write_lcms_chunk_to_mzml(data,
+                                                  writer,
+                                                  frame_start,
+                                                  frame_stop,
+                                                  scan_count,
+                                                  mode,
+                                                  ms2_only,
+                                                  exclude_mobility,
+                                                  profile_bins,
+                                                  encoding,
+                                                  compression,
+                                                  executor=executor)
+    else:
+        for parent_scans, product_scans in parse_frame_ranges_in_parallel(process_pool,
+                                                                          parse_lcms_chunk,
+                                                                          chunk_list,
+                                                                          mode,
+                                                                          ms2_only,
+                                                                          exclude_mobility,
+                                                                          profile_bins,
+                                                                          encoding,
+                                                                          max_pending_tasks=2 * num_workers):
+            scan_count = write_lcms_scans_to_mzml(data, writer, parent_scans, product_scans, scan_count, ms2_only,
+                                                  encoding, compression)
+    return scan_count
+
+
 def write_lcms_mzml(data, infile, outdir, outfile, mode, ms2_only, exclude_mobility, profile_bins, encoding,
-                    compression, barebones_metadata, chunk_size):
+                    compression, barebones_metadata, chunk_size, num_workers=1):
     """
     Parse and write out spectra to an mzML file from an LC-MS(/MS) dataset using psims.
 
@@ -454,71 +652,80 @@ def write_lcms_mzml(data, infile, outdir, outfile, mode, ms2_only, exclude_mobil
         timsconvert.write.write_lcms_chunk_to_mzml() for memory efficiency; larger chunk_size requires more memory
         during conversion.
     :type chunk_size: int
+    :param num_workers: Number of worker processes used to parse the frames in each chunk in parallel; 1 parses all
+        frames in the current process, defaults to 1.
+    :type num_workers: int
     """
     # Initialize mzML writer using psims.
     logging.info(get_timestamp() + ':' + 'Initializing mzML Writer...')
-    writer = MzMLWriter(os.path.splitext(os.path.join(outdir, outfile))[0] + '_tmp.mzML', close=True)
+    writer = init_mzml_writer(os.path.splitext(os.path.join(outdir, outfile))[0] + '_tmp.mzML')
+    # Frames in each chunk are parsed by worker processes that open their own copy of the dataset.
+    if num_workers > 1:
+        logging.info(get_timestamp() + ':' + 'Starting ' + str(num_workers) + ' parser processes...')
+        process_pool = init_parse_process_pool(data, num_workers)
+    else:
+        process_pool = None
+    # Raw ddaPASEF precursor spectra are sorted and deduplicated on a thread pool while the next one is read.
+    if isinstance(data, TimsconvertTdfData) and mode == 'raw' and process_pool is None:
+        executor = ThreadPoolExecutor()
+    else:
+        executor = None
 
-    with writer:
-        # Begin mzML with controlled vocabularies (CV).
-        logging.info(get_timestamp() + ':' + 'Initializing controlled vocabularies...')
-        writer.controlled_vocabularies()
+    # Worker processes and threads are shut down even if parsing or writing fails.
+    try:
+        with writer:
+            # Begin mzML with controlled vocabularies (CV).
+            logging.info(get_timestamp() + ':' + 'Initializing controlled vocabularies...')
+            writer.controlled_vocabularies()
 
-        # Start write acquisition, instrument config, processing, etc. to mzML.
-        logging.info(get_timestamp() + ':' + 'Writing mzML metadata...')
-        write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
+            # Start write acquisition, instrument config, processing, etc. to mzML.
+            logging.info(get_timestamp() + ':' + 'Writing mzML metadata...')
+            write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
 
-        logging.info(get_timestamp() + ':' + 'Writing data to .mzML file ' + os.path.join(outdir, outfile) + '...')
-        # Parse chunks of data and write to spectrum elements.
-        with writer.run(id='run', instrument_configuration='instrument'):
-            scan_count = 0
-            # Count number of spectra in run.
-            logging.info(get_timestamp() + ':' + 'Calculating number of spectra...')
-            num_of_spectra = get_spectra_count(data)
-            with writer.spectrum_list(count=num_of_spectra):
-                chunk = 0
-                # Write data in chunks of chunks_size.
-                while chunk + chunk_size + 1 <= len(data.ms1_frames):
-                    chunk_list = []
-                    for i, j in zip(data.ms1_frames[chunk: chunk + chunk_size],
-                                    data.ms1_frames[chunk + 1: chunk + chunk_size + 1]):
-                        chunk_list.append((int(i), int(j)))
-                    logging.info(get_timestamp() + ':' + 'Parsing and writing Frame ' + str(chunk_list[0][0]) + '...')
-                    for frame_start, frame_stop in chunk_list:
-                        scan_count = write_lcms_chunk_to_mzml(data,
-                                                              writer,
-                                                              frame_start,
-                                                              frame_stop,
-                                                              scan_count,
-                                                              mode,
-                                                              ms2_only,
-                                                              exclude_mobility,
-                                                              profile_bins,
-                                                              encoding,
-                                                              compression)
-                    chunk += chunk_size
-                # Last chunk may be smaller than chunk_size
-                else:
-                    chunk_list = []
-                    for i, j in zip(data.ms1_frames[chunk:-1], data.ms1_frames[chunk + 1:]):
-                        chunk_list.append((int(i), int(j)))
+            logging.info(get_timestamp() + ':' + 'Writing data to .mzML file ' + os.path.join(outdir, outfile) + '...')
+            # Parse chunks of data and write to spectrum elements.
+            with writer.run(id='run', instrument_configuration='instrument'):
+                scan_count = 0
+                # Count number of spectra in run.
+                logging.info(get_timestamp() + ':' + 'Calculating number of spectra...')
+                num_of_spectra = get_spectra_count(data)
+                with writer.spectrum_list(count=format_spectra_count(num_of_spectra)):
+                    # Each MS1 frame starts a frame range that ends at the next MS1 frame; the last range runs to the
+                    # end of the dataset.
                     if isinstance(data, TimsconvertBafData):
-                        chunk_list.append((j, data.analysis['Spectra'].shape[0] + 1))
+                        last_frame = data.analysis['Spectra'].shape[0]
                     elif isinstance(data, TimsconvertTsfData) or isinstance(data, TimsconvertTdfData):
-                        chunk_list.append((j, data.analysis['Frames'].shape[0] + 1))
-                    logging.info(get_timestamp() + ':' + 'Parsing and writing Frame ' + str(chunk_list[0][0]) + '...')
-                    for frame_start, frame_stop in chunk_list:
-                        scan_count = write_lcms_chunk_to_mzml(data,
-                                                              writer,
-                                                              frame_start,
-                                                              frame_stop,
-                                                              scan_count,
-                                                              mode,
-                                                              ms2_only,
-                                                              exclude_mobility,
-                                                              profile_bins,
-                                                              encoding,
-                                                              compression)
+                        last_frame = data.analysis['Frames'].shape[0]
+                    frame_starts = [int(i) for i in data.ms1_frames]
+                    frame_ranges = list(zip(frame_starts, frame_starts[1:] + [last_frame + 1]))
+                    # Write data in chunks of chunks_size.
+                    for chunk in range(0, len(frame_ranges), chunk_size):
+                        chunk_list = frame_ranges[chunk: chunk + chunk_size]
+                        # Let the OS read the next chunk of frames from the binary file while this chunk is parsed.
+                        if isinstance(data, TimsconvertTsfData) or isinstance(data, TimsconvertTdfData):
+                            next_chunk_list = frame_ranges[chunk + chunk_size: chunk + 2 * chunk_size]
+                            if next_chunk_list:
+                                data.prefetch_frames(next_chunk_list[0][0], next_chunk_list[-1][1])
+                        logging.info(get_timestamp() + ':' + 'Parsing and writing Frame ' +
+                                     str(chunk_list[0][0]) + '...')
+                        scan_count = write_lcms_chunk_list_to_mzml(data,
+                                                                   writer,
+                                                                   chunk_list,
+                                                                   scan_count,
+                                                                   mode,
+                                                                   ms2_only,
+                                                                   exclude_mobility,
+                                                                   profile_bins,
+                                                                   encoding,
+                                                                   compression,
+                                                                   executor=executor,
+                                                                   process_pool=process_pool,
+                                                                   num_workers=num_workers)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if process_pool is not None:
+            process_pool.shutdown()
 
     if num_of_spectra != scan_count:
         logging.info(get_timestamp() + ':' + 'Updating scan count...')
@@ -532,8 +739,115 @@ def write_lcms_mzml(data, infile, outdir, outfile, mode, ms2_only, exclude_mobil
                  os.path.join(outdir, outfile) + '...')
 
 
+def iterate_in_background(iterable, maxsize=64):
+    """
+    Iterate over an iterable on a background thread so that producing the next items (e.g. reading and parsing
+    spectra with the TDF-SDK, which releases the GIL) overlaps with consuming the current ones (e.g. writing spectra
+    with psims). At most maxsize items are queued ahead of the consumer, in addition to whatever the iterable itself
+    holds (e.g. the frame ranges in flight in timsconvert.parse.parse_frame_ranges_in_parallel()). Exceptions raised
+    while producing items are re-raised in the consuming thread. If the consumer stops early, the producer stops
+    after its current item and the iterable is closed.
+
+    :param iterable: Iterable to consume, i.e. a generator from timsconvert.parse.parse_maldi_frames().
+    :type iterable: collections.abc.Iterable
+    :param maxsize: Maximum number of items that are produced ahead of the consumer, defaults to 64.
+    :type maxsize: int
+    :return: Generator that yields the items of iterable in order.
+    :rtype: collections.abc.Generator
+    """
+    item_queue = queue.Queue(maxsize=maxsize)
+    end_of_items = object()
+    stop_producing = threading.Event()
+    errors = []
+
+    def produce_items():
+        try:
+            for item in iterable:
+                if stop_producing.is_set():
+                    break
+                item_queue.put(item)
+        except BaseException as err:
+            errors.append(err)
+        finally:
+            # Close the iterable in this thread, e.g. so that timsconvert.parse.parse_frame_ranges_in_parallel()
+            # cancels its pending tasks when the consumer stops early.
+            if hasattr(iterable, 'close'):
+                iterable.close()
+            item_queue.put(end_of_items)
+
+    # Daemon thread so that a consumer that stops early cannot keep the process alive.
+    producer = threading.Thread(target=produce_items, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = item_queue.get()
+            if item is end_of_items:
+                break
+            yield item
+    finally:
+        # If the consumer stops early, empty the queue until the producer has seen stop_producing and finished.
+        stop_producing.set()
+        while producer.is_alive():
+            try:
+                item_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        producer.join()
+    if errors:
+        raise errors[0]
+
+
+def write_maldi_dd_sample_mzml(data, infile, output_filename, title, list_of_scan_dicts, mode, ms2_only, encoding,
+                               compression, barebones_metadata):
+    """
+    Write out the spectra from one sample/condition of a MALDI-MS(/MS) dried droplet dataset to an mzML file using
+    psims. Used for the "sample" output mode of timsconvert.write.write_maldi_dd_mzml(), either in the main process or
+    in a worker process via timsconvert.parse.run_in_worker().
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param infile: Input file path to be used for source file metadata.
+    :type infile: str
+    :param output_filename: Path to the output file.
+    :type output_filename: str
+    :param title: Spectrum title, i.e. the sample name from the plate map.
+    :type title: str
+    :param list_of_scan_dicts: List of dictionaries containing the spectra of this sample.
+    :type list_of_scan_dicts: list[dict]
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param ms2_only: Whether to include MS1 data in the output files.
+    :type ms2_only: bool
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param compression: Compression command line parameter, either "zlib" or "none".
+    :type compression: str
+    :param barebones_metadata: If True, omit software and data processing metadata in the resulting mzML files. Used
+        for compatibility with downstream analysis software that does not have support for newer CV params or
+        UserParams.
+    :type barebones_metadata: bool
+    """
+    writer = init_mzml_writer(output_filename)
+
+    with writer:
+        writer.controlled_vocabularies()
+        write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
+        with writer.run(id='run', instrument_configuration='instrument'):
+            # MS1 spectra are dropped once up front rather than tested for in the write loop, so the number of spectra
+            # is known before the spectrum list is started and the count does not have to be updated afterwards.
+            if ms2_only:
+                list_of_scan_dicts = [i for i in list_of_scan_dicts if i['ms_level'] != 1]
+            with writer.spectrum_list(count=len(list_of_scan_dicts)):
+                for scan_count, scan_dict in enumerate(list_of_scan_dicts, start=1):
+                    scan_dict['scan_number'] = scan_count
+                    if scan_dict['ms_level'] == 1:
+                        write_ms1_spectrum(writer, data, scan_dict, encoding, compression, title=title)
+                    elif scan_dict['ms_level'] == 2:
+                        write_ms2_spectrum(writer, data, scan_dict, encoding, compression, title=title)
+
+
 def write_maldi_dd_mzml(data, infile, outdir, outfile, mode, ms2_only, exclude_mobility, profile_bins, encoding,
-                        compression, maldi_output_file, plate_map, barebones_metadata):
+                        compression, maldi_output_file, plate_map, barebones_metadata, num_workers=1):
     """
     Parse and write out spectra to an mzML file from a MALDI-MS(/MS) dried droplet dataset using psims.
 
@@ -569,6 +883,9 @@ def write_maldi_dd_mzml(data, infile, outdir, outfile, mode, ms2_only, exclude_m
         for compatibility with downstream analysis software that does not have support for newer CV params or
         UserParams.
     :type barebones_metadata: bool
+    :param num_workers: Number of worker processes used to parse frames in parallel; 1 parses all frames in the
+        current process, defaults to 1.
+    :type num_workers: int
     """
     if isinstance(data, TimsconvertBafData):
         frames_key = 'Spectra'
@@ -576,279 +893,277 @@ def write_maldi_dd_mzml(data, infile, outdir, outfile, mode, ms2_only, exclude_m
     elif isinstance(data, TimsconvertTsfData) or isinstance(data, TimsconvertTdfData):
         frames_key = 'Frames'
         metadata_key = 'GlobalMetadata'
-    # All spectra from a given TSF or TDF file are combined into a single mzML file.
-    if maldi_output_file == 'combined':
-        # Initialize mzML writer using psims.
-        logging.info(get_timestamp() + ':' + 'Initializing mzML Writer...')
-        writer = MzMLWriter(os.path.splitext(os.path.join(outdir, outfile))[0] + '_tmp.mzML', close=True)
-
-        with writer:
-            # Begin mzML with controlled vocabularies (CV).
-            logging.info(get_timestamp() + ':' + 'Initializing controlled vocabularies...')
-            writer.controlled_vocabularies()
-
-            # Start write acquisition, instrument config, processing, etc. to mzML.
-            logging.info(get_timestamp() + ':' + 'Writing mzML metadata...')
-            write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
-
-            logging.info(get_timestamp() + ':' + 'Writing data to .mzML file ' + os.path.join(outdir, outfile) + '...')
-            # Parse chunks of data and write to spectrum element.
-            with writer.run(id='run', instrument_configuration='instrument'):
-                scan_count = 0
-                # Count number of spectra in run.
-                logging.info(get_timestamp() + ':' + 'Calculating number of spectra...')
-                num_of_spectra = len(data.analysis[frames_key]['Id'].to_list())
-                with writer.spectrum_list(count=num_of_spectra):
-                    # Parse all MALDI data.
-                    num_frames = data.analysis[frames_key].shape[0] + 1
-                    # Parse TSF data.
-                    if data.analysis[metadata_key]['SchemaType'] == 'TSF':
-                        if mode == 'raw':
+    # Frames are parsed by worker processes that open their own copy of the dataset. In "sample" mode, the workers
+    # also write mzML files, so they use the same binary array encoding as this process.
+    if num_workers > 1:
+        logging.info(get_timestamp() + ':' + 'Starting ' + str(num_workers) + ' parser processes...')
+        if ACCELERATED_ENCODING:
+            process_pool = init_parse_process_pool(data, num_workers, worker_initializer=init_accelerated_encoding)
+        else:
+            process_pool = init_parse_process_pool(data, num_workers)
+    else:
+        process_pool = None
+    # Worker processes are shut down even if parsing or writing fails.
+    try:
+        # All spectra from a given TSF or TDF file are combined into a single mzML file.
+        if maldi_output_file == 'combined':
+            # Initialize mzML writer using psims.
+            logging.info(get_timestamp() + ':' + 'Initializing mzML Writer...')
+            writer = init_mzml_writer(os.path.splitext(os.path.join(outdir, outfile))[0] + '_tmp.mzML')
+
+            with writer:
+                # Begin mzML with controlled vocabularies (CV).
+                logging.info(get_timestamp() + ':' + 'Initializing controlled vocabularies...')
+                writer.controlled_vocabularies()
+
+                # Start write acquisition, instrument config, processing, etc. to mzML.
+                logging.info(get_timestamp() + ':' + 'Writing mzML metadata...')
+                write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
+
+                logging.info(get_timestamp() + ':' + 'Writing data to .mzML file ' +
+                             os.path.join(outdir, outfile) + '...')
+                # Parse chunks of data and write to spectrum element.
+                with writer.run(id='run', instrument_configuration='instrument'):
+                    scan_count = 0
+                    # Count number of spectra in run.
+                    logging.info(get_timestamp() + ':' + 'Calculating number of spectra...')
+                    num_of_spectra = len(data.analysis[frames_key]['Id'].to_list())
+                    with writer.spectrum_list(count=format_spectra_count(num_of_spectra)):
+                        # Parse all MALDI data.
+                        num_frames = data.analysis[frames_key].shape[0] + 1
+                        if data.analysis[metadata_key]['SchemaType'] == 'TSF' and mode == 'raw':
                             logging.info(get_timestamp() + ':' + 'TSF file detected. Only export in profile or '
                                                                  'centroid mode are supported. Defaulting to centroid '
                                                                  'mode.')
-                        list_of_scan_dicts = parse_maldi_tsf(data,
-                                                             1,
-                                                             num_frames,
-                                                             mode,
-                                                             ms2_only,
-                                                             profile_bins,
-                                                             encoding)
-                    # Parse TDF data.
-                    elif data.analysis[metadata_key]['SchemaType'] == 'TDF':
-                        list_of_scan_dicts = parse_maldi_tdf(data,
-                                                             1,
-                                                             num_frames,
-                                                             mode,
-                                                             ms2_only,
-                                                             exclude_mobility,
-                                                             profile_bins,
-                                                             encoding)
-                    # Write MS1 parent scans.
-                    for scan_dict in list_of_scan_dicts:
-                        if ms2_only and scan_dict['ms_level'] == 1:
-                            pass
-                        else:
-                            scan_count += 1
-                            scan_dict['scan_number'] = scan_count
-                            if scan_dict['ms_level'] == 1:
-                                write_ms1_spectrum(writer,
-                                                   data,
-                                                   scan_dict,
-                                                   encoding,
-                                                   compression,
-                                                   title=os.path.splitext(outfile)[0])
-                            elif scan_dict['ms_level'] == 2:
-                                write_ms2_spectrum(writer,
-                                                   data,
-                                                   scan_dict,
-                                                   encoding,
-                                                   compression,
-                                                   title=os.path.splitext(outfile)[0])
-
-        logging.info(get_timestamp() + ':' + 'Updating scan count...')
-        update_spectra_count(outdir, outfile, num_of_spectra, scan_count)
-        logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' + os.path.join(outdir, outfile) + '...')
-
-    # Each spectrum in a given TSF or TDF file is output as its own individual mzML file.
-    elif maldi_output_file == 'individual' and plate_map != '':
-        # Check to make sure plate map is a valid csv file.
-        if os.path.exists(plate_map) and os.path.splitext(plate_map)[1] == '.csv':
-            # Parse all MALDI data.
-            num_frames = data.analysis[frames_key].shape[0] + 1
-            # Parse TSF data.
-            if data.analysis[metadata_key]['SchemaType'] == 'TSF':
-                if mode == 'raw':
+                        # Parse TSF or TDF data on a background thread while parsed spectra are written.
+                        list_of_scan_dicts = iterate_in_background(parse_maldi_frames(data,
+                                                                                      1,
+                                                                                      num_frames,
+                                                                                      mode,
+                                                                                      ms2_only,
+                                                                                      exclude_mobility,
+                                                                                      profile_bins,
+                                                                                      encoding,
+                                                                                      process_pool=process_pool,
+                                                                                      num_workers=num_workers))
+                        # All spectra in the combined file share the output filename as their title.
+                        title = os.path.splitext(outfile)[0]
+                        # Closed explicitly so that the background thread stops if writing fails.
+                        try:
+                            # Write MS1 parent scans.
+                            for scan_dict in list_of_scan_dicts:
+                                if ms2_only and scan_dict['ms_level'] == 1:
+                                    pass
+                                else:
+                                    scan_count += 1
+                                    scan_dict['scan_number'] = scan_count
+                                    if scan_dict['ms_level'] == 1:
+                                        write_ms1_spectrum(writer,
+                                                           data,
+                                                           scan_dict,
+                                                           encoding,
+                                                           compression,
+                                                           title=title)
+                                    elif scan_dict['ms_level'] == 2:
+                                        write_ms2_spectrum(writer,
+                                                           data,
+                                                           scan_dict,
+                                                           encoding,
+                                                           compression,
+                                                           title=title)
+                        finally:
+                            list_of_scan_dicts.close()
+
+            logging.info(get_timestamp() + ':' + 'Updating scan count...')
+            update_spectra_count(outdir, outfile, num_of_spectra, scan_count)
+            logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' +
+                         os.path.join(outdir, outfile) + '...')
+
+        # Each spectrum in a given TSF or TDF file is output as its own individual mzML file.
+        elif maldi_output_file == 'individual' and plate_map != '':
+            # Check to make sure plate map is a valid csv file.
+            if os.path.exists(plate_map) and os.path.splitext(plate_map)[1] == '.csv':
+                # Parse all MALDI data.
+                num_frames = data.analysis[frames_key].shape[0] + 1
+                if data.analysis[metadata_key]['SchemaType'] == 'TSF' and mode == 'raw':
                     logging.info(get_timestamp() + ':' + 'TSF file detected. Only export in profile or '
                                                          'centroid mode are supported. Defaulting to centroid '
                                                          'mode.')
-                list_of_scan_dicts = parse_maldi_tsf(data,
-                                                     1,
-                                                     num_frames,
-                                                     mode,
-                                                     ms2_only,
-                                                     profile_bins,
-                                                     encoding)
-            # Parse TDF data.
-            elif data.analysis[metadata_key]['SchemaType'] == 'TDF':
-                list_of_scan_dicts = parse_maldi_tdf(data,
-                                                     1,
-                                                     num_frames,
-                                                     mode,
-                                                     ms2_only,
-                                                     exclude_mobility,
-                                                     profile_bins,
-                                                     encoding)
-
-            # Use plate map to determine filename.
-            # Names things as sample_position.mzML
-            plate_map_dict = parse_maldi_plate_map(plate_map)
-
-            for scan_dict in list_of_scan_dicts:
-                output_filename = os.path.join(outdir,
-                                               plate_map_dict[scan_dict['coord']] + '_' + scan_dict['coord'] + '.mzML')
-
-                writer = MzMLWriter(output_filename, close=True)
-
-                with writer:
-                    writer.controlled_vocabularies()
-
-                    write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
-
-                    with writer.run(id='run', instrument_configuration='instrument'):
-                        scan_count = 1
-                        scan_dict['scan_number'] = scan_count
-                        with writer.spectrum_list(count=scan_count):
-                            if ms2_only and scan_dict['ms_level'] == 1:
-                                pass
-                            else:
-                                if scan_dict['ms_level'] == 1:
-                                    write_ms1_spectrum(writer,
-                                                       data,
-                                                       scan_dict,
-                                                       encoding,
-                                                       compression,
-                                                       title=plate_map_dict[scan_dict['coord']])
-                                elif scan_dict['ms_level'] == 2:
-                                    write_ms2_spectrum(writer,
-                                                       data,
-                                                       scan_dict,
-                                                       encoding,
-                                                       compression,
-                                                       title=plate_map_dict[scan_dict['coord']])
-                logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' +
-                             os.path.join(outdir, output_filename) + '...')
-
-    # Group spectra from a given TSF or TDF file by sample name based on user provided plate map.
-    elif maldi_output_file == 'sample' and plate_map != '':
-        # Check to make sure plate map is a valid csv file.
-        if os.path.exists(plate_map) and os.path.splitext(plate_map)[1] == '.csv':
-            # Parse all MALDI data.
-            num_frames = data.analysis[frames_key].shape[0] + 1
-            # Parse TSF data.
-            if data.analysis[metadata_key]['SchemaType'] == 'TSF':
-                if mode == 'raw':
-                    logging.info(get_timestamp() + ':' + 'TSF file detected. Only export in profile or '
-                                                         'centroid mode are supported. Defaulting to centroid '
-                                                         'mode.')
-                list_of_scan_dicts = parse_maldi_tsf(data,
-                                                     1,
-                                                     num_frames,
-                                                     mode,
-                                                     ms2_only,
-                                                     profile_bins,
-                                                     encoding)
-            # Parse TDF data.
-            elif data.analysis[metadata_key]['SchemaType'] == 'TDF':
-                list_of_scan_dicts = parse_maldi_tdf(data,
-                                                     1,
-                                                     num_frames,
-                                                     mode,
-                                                     ms2_only,
-                                                     exclude_mobility,
-                                                     profile_bins,
-                                                     encoding)
-
-            # Parse plate map.
-            plate_map_dict = parse_maldi_plate_map(plate_map)
-
-            # Get coordinates for each condition replicate.
-            conditions = [str(value) for key, value in plate_map_dict.items()]
-            conditions = sorted(list(set(conditions)))
-
-            dict_of_scan_lists = {}
-            for i in conditions:
-                dict_of_scan_lists[i] = []
-
-            for key, value in plate_map_dict.items():
-                try:
-                    dict_of_scan_lists[value].append(key)
-                except KeyError:
-                    pass
-
-            for key, value in dict_of_scan_lists.items():
-                if key != 'nan':
-                    output_filename = os.path.join(outdir, key + '.mzML')
-
-                    writer = MzMLWriter(output_filename, close=True)
+                # Parse TSF or TDF data.
+                list_of_scan_dicts = parse_maldi_frames(data,
+                                                        1,
+                                                        num_frames,
+                                                        mode,
+                                                        ms2_only,
+                                                        exclude_mobility,
+                                                        profile_bins,
+                                                        encoding,
+                                                        process_pool=process_pool,
+                                                        num_workers=num_workers)
+
+                # Use plate map to determine filename.
+                # Names things as sample_position.mzML
+                plate_map_dict = parse_maldi_plate_map(plate_map)
+                # Empty plate map wells are read as NaN and have no output file.
+                output_filenames = {coord: os.path.join(outdir, sample + '_' + coord + '.mzML')
+                                    for coord, sample in plate_map_dict.items()
+                                    if isinstance(sample, str)}
+
+                for scan_dict in list_of_scan_dicts:
+                    # Spectra from empty wells or from spots that are not on the plate map are not written.
+                    if scan_dict['coord'] not in output_filenames:
+                        continue
+                    output_filename = output_filenames[scan_dict['coord']]
+
+                    writer = init_mzml_writer(output_filename)
 
                     with writer:
                         writer.controlled_vocabularies()
+
                         write_mzml_metadata(data, writer, infile, mode, ms2_only, barebones_metadata)
+
                         with writer.run(id='run', instrument_configuration='instrument'):
-                            scan_count = len(value)
+                            scan_count = 1
+                            scan_dict['scan_number'] = scan_count
                             with writer.spectrum_list(count=scan_count):
-                                condition_scan_dicts = [i for i in list_of_scan_dicts if i['coord'] in value]
-                                scan_count = 0
-                                for scan_dict in condition_scan_dicts:
-                                    if ms2_only and scan_dict['ms_level'] == 1:
-                                        pass
-                                    else:
-                                        scan_count += 1
-                                        scan_dict['scan_number'] = scan_count
-                                        if scan_dict['ms_level'] == 1:
-                                            write_ms1_spectrum(writer,
-                                                               data,
-                                                               scan_dict,
-                                                               encoding,
-                                                               compression,
-                                                               title=key)
-                                        elif scan_dict['ms_level'] == 2:
-                                            write_ms2_spectrum(writer,
-                                                               data,
-                                                               scan_dict,
-                                                               encoding,
-                                                               compression,
-                                                               title=key)
-
+                                if ms2_only and scan_dict['ms_level'] == 1:
+                                    pass
+                                else:
+                                    if scan_dict['ms_level'] == 1:
+                                        write_ms1_spectrum(writer,
+                                                           data,
+                                                           scan_dict,
+                                                           encoding,
+                                                           compression,
+                                                           title=plate_map_dict[scan_dict['coord']])
+                                    elif scan_dict['ms_level'] == 2:
+                                        write_ms2_spectrum(writer,
+                                                           data,
+                                                           scan_dict,
+                                                           encoding,
+                                                           compression,
+                                                           title=plate_map_dict[scan_dict['coord']])
                     logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' +
-                                 os.path.join(outdir, outfile) + '...')
+                                 os.path.join(outdir, output_filename) + '...')
+
+        # Group spectra from a given TSF or TDF file by sample name based on user provided plate map.
+        elif maldi_output_file == 'sample' and plate_map != '':
+            # Check to make sure plate map is a valid csv file.
+            if os.path.exists(plate_map) and os.path.splitext(plate_map)[1] == '.csv':
+                # Parse all MALDI data.
+                num_frames = data.analysis[frames_key].shape[0] + 1
+                if data.analysis[metadata_key]['SchemaType'] == 'TSF' and mode == 'raw':
+                    logging.info(get_timestamp() + ':' + 'TSF file detected. Only export in profile or '
+                                                         'centroid mode are supported. Defaulting to centroid '
+                                                         'mode.')
+                # Parse TSF or TDF data. Spectra are grouped by sample below, so they are collected in a list.
+                list_of_scan_dicts = list(parse_maldi_frames(data,
+                                                             1,
+                                                             num_frames,
+                                                             mode,
+                                                             ms2_only,
+                                                             exclude_mobility,
+                                                             profile_bins,
+                                                             encoding,
+                                                             process_pool=process_pool,
+                                                             num_workers=num_workers))
+
+                # Parse plate map.
+                plate_map_dict = parse_maldi_plate_map(plate_map)
+
+                # Get coordinates for each condition replicate.
+                conditions = dict.fromkeys(str(value) for value in plate_map_dict.values())
+
+                dict_of_scan_lists = {i: [] for i in conditions}
+                for key, value in plate_map_dict.items():
+                    if value in dict_of_scan_lists:
+                        dict_of_scan_lists[value].append(key)
+
+                # Group the spectra of each condition in a single pass over all spectra.
+                condition_scan_dicts = {key: [] for key in dict_of_scan_lists.keys() if key != 'nan'}
+                coord_conditions = {coord: key for key, value in dict_of_scan_lists.items() if key != 'nan'
+                                    for coord in value}
+                for scan_dict in list_of_scan_dicts:
+                    if scan_dict['coord'] in coord_conditions:
+                        condition_scan_dicts[coord_conditions[scan_dict['coord']]].append(scan_dict)
+                # Spectra from spots without a condition are released here, and each condition's spectra are released
+                # once its file has been written.
+                del list_of_scan_dicts
+
+                # Each condition is written to its own file, so files are written by the worker processes in parallel.
+                if process_pool is not None:
+                    # At most 2 * num_workers conditions are handed to the workers at a time, so the spectra of the
+                    # remaining conditions are not copied to the worker processes before a worker can write them.
+                    futures = collections.deque()
+                    for key in list(condition_scan_dicts.keys()):
+                        if len(futures) == 2 * num_workers:
+                            future, finished_filename = futures.popleft()
+                            future.result()
+                            logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' +
+                                         finished_filename + '...')
+                        scan_dicts = condition_scan_dicts.pop(key)
+                        output_filename = os.path.join(outdir, key + '.mzML')
+                        future = process_pool.submit(run_in_worker,
+                                                     write_maldi_dd_sample_mzml,
+                                                     infile,
+                                                     output_filename,
+                                                     key,
+                                                     scan_dicts,
+                                                     mode,
+                                                     ms2_only,
+                                                     encoding,
+                                                     compression,
+                                                     barebones_metadata)
+                        futures.append((future, output_filename))
+                    while futures:
+                        future, finished_filename = futures.popleft()
+                        future.result()
+                        logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' +
+                                     finished_filename + '...')
+                else:
+                    for key in list(condition_scan_dicts.keys()):
+                        scan_dicts = condition_scan_dicts.pop(key)
+                        output_filename = os.path.join(outdir, key + '.mzML')
+                        write_maldi_dd_sample_mzml(data,
+                                                   infile,
+                                                   output_filename,
+                                                   key,
+                                                   scan_dicts,
+                                                   mode,
+                                                   ms2_only,
+                                                   encoding,
+                                                   compression,
+                                                   barebones_metadata)
+                        logging.info(get_timestamp() + ':' + 'Finished writing to .mzML file ' +
+                                     output_filename + '...')
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
 
 
-def write_maldi_ims_chunk_to_imzml(data, imzml_file, frame_start, frame_stop, mode, exclude_mobility, profile_bins,
-                                   encoding):
+def write_maldi_ims_scans_to_imzml(data, imzml_file, list_of_scan_dicts, mode, exclude_mobility):
     """
-    Parse and write out a group of spectra to an imzML file from a MALDI-MS(/MS) MSI dataset using pyimzML.
+    Write out a group of parsed spectra to an imzML file from a MALDI-MS(/MS) MSI dataset using pyimzML.
 
     :param data: Object containing raw data information from TDF or TSF file.
     :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
     :param imzml_file: Instance of pyimzml.ImzMLWriter.ImzMLWriter for output file.
     :type imzml_file: pyimzml.ImzMLWriter.ImzMLWriter
-    :param frame_start: Beginning frame number.
-    :type frame_start: int
-    :param frame_stop: Ending frame number (non-inclusive).
-    :type frame_stop: int
+    :param list_of_scan_dicts: List or generator of dictionaries containing spectrum data.
+    :type list_of_scan_dicts: list[dict] | collections.abc.Iterator[dict]
     :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
     :type mode: str
     :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
     :type exclude_mobility: bool
-    :param profile_bins: Number of bins to bin spectrum to.
-    :type profile_bins: int
-    :param encoding: Encoding command line parameter, either "64" or "32".
-    :type encoding: int
     """
-    # Parse and write TSF data.
+    # Write TSF data.
     if isinstance(data, TimsconvertTsfData):
-        list_of_scan_dicts = parse_maldi_tsf(data,
-                                             frame_start,
-                                             frame_stop, mode,
-                                             False,
-                                             profile_bins,
-                                             encoding)
         for scan_dict in list_of_scan_dicts:
             imzml_file.addSpectrum(scan_dict['mz_array'],
                                    scan_dict['intensity_array'],
                                    scan_dict['coord'])
-    # Parse TDF data.
+    # Write TDF data.
     elif isinstance(data, TimsconvertTdfData):
-        list_of_scan_dicts = parse_maldi_tdf(data,
-                                             frame_start,
-                                             frame_stop,
-                                             mode,
-                                             False,
-                                             exclude_mobility,
-                                             profile_bins,
-                                             encoding)
         if mode == 'profile':
             exclude_mobility = True
         if not exclude_mobility:
@@ -864,8 +1179,186 @@ def write_maldi_ims_chunk_to_imzml(data, imzml_file, frame_start, frame_stop, mo
                                        scan_dict['coord'])
 
 
+def write_maldi_ims_chunk_to_imzml(data, imzml_file, frame_start, frame_stop, mode, exclude_mobility, profile_bins,
+                                   encoding):
+    """
+    Parse and write out a group of spectra to an imzML file from a MALDI-MS(/MS) MSI dataset using pyimzML.
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param imzml_file: Instance of pyimzml.ImzMLWriter.ImzMLWriter for output file.
+    :type imzml_file: pyimzml.ImzMLWriter.ImzMLWriter
+    :param frame_start: Beginning frame number.
+    :type frame_start: int
+    :param frame_stop: Ending frame number (non-inclusive).
+    :type frame_stop: int
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    """
+    list_of_scan_dicts = parse_maldi_chunk(data,
+                                           frame_start,
+                                           frame_stop,
+                                           mode,
+                                           False,
+                                           exclude_mobility,
+                                           profile_bins,
+                                           encoding)
+    write_maldi_ims_scans_to_imzml(data, imzml_file, list_of_scan_dicts, mode, exclude_mobility)
+
+
+def write_maldi_ims_chunk_list_to_imzml(data, imzml_file, chunk_list, parsed_frame_ranges, mode, exclude_mobility):
+    """
+    Write out a list of frame ranges to an imzML file from a MALDI-MS(/MS) MSI dataset using pyimzML. The spectra are
+    taken from parsed_frame_ranges, which is shared by all chunks of the dataset so that frames keep being parsed in
+    the background (see timsconvert.write.iterate_maldi_ims_frame_ranges()) while a chunk is written and across chunk
+    boundaries.
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param imzml_file: Instance of pyimzml.ImzMLWriter.ImzMLWriter for output file.
+    :type imzml_file: pyimzml.ImzMLWriter.ImzMLWriter
+    :param chunk_list: List of (frame_start, frame_stop) tuples.
+    :type chunk_list: list[tuple[int]]
+    :param parsed_frame_ranges: Iterator yielding a list of dictionaries containing spectrum data for each frame range
+        of the dataset in frame order, positioned at the first frame range in chunk_list.
+    :type parsed_frame_ranges: collections.abc.Iterator[list[dict]]
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool
+    """
+    for list_of_scan_dicts in itertools.islice(parsed_frame_ranges, len(chunk_list)):
+        write_maldi_ims_scans_to_imzml(data, imzml_file, list_of_scan_dicts, mode, exclude_mobility)
+
+
+def iterate_maldi_ims_frame_ranges(data, frame_ranges, mode, exclude_mobility, profile_bins, encoding,
+                                   process_pool=None, num_workers=1):
+    """
+    Parse a list of frame ranges from a MALDI-MS(/MS) MSI dataset with timsconvert.parse.parse_maldi_chunk_to_list()
+    ahead of the consumer. If a process pool from timsconvert.parse.init_parse_process_pool() is provided, the frame
+    ranges are parsed in parallel by the worker processes. Otherwise, frames are parsed on a background thread using
+    timsconvert.write.iterate_in_background() so that pyimzML writes stay in the consuming thread.
+
+    :param data: Object containing raw data information from TDF or TSF file.
+    :type data: timsconvert.classes.TimsconvertTdfData | timsconvert.classes.TimsconvertTsfData
+    :param frame_ranges: List of (frame_start, frame_stop) tuples.
+    :type frame_ranges: list[tuple[int]]
+    :param mode: Mode command line parameter, either "profile", "centroid", or "raw".
+    :type mode: str
+    :param exclude_mobility: Whether to include mobility data in the output files, defaults to None.
+    :type exclude_mobility: bool
+    :param profile_bins: Number of bins to bin spectrum to.
+    :type profile_bins: int
+    :param encoding: Encoding command line parameter, either "64" or "32".
+    :type encoding: int
+    :param process_pool: Process pool used to parse frame ranges in parallel, defaults to None.
+    :type process_pool: concurrent.futures.ProcessPoolExecutor | None
+    :param num_workers: Number of worker processes in process_pool, defaults to 1.
+    :type num_workers: int
+    :return: Generator yielding a list of dictionaries containing spectrum data for each frame range in frame order.
+        It should be closed once it is no longer needed so that parsing stops if writing fails.
+    :rtype: collections.abc.Generator
+    """
+    if process_pool is None:
+        return iterate_in_background(parse_maldi_chunk_to_list(data,
+                                                               frame_start,
+                                                               frame_stop,
+                                                               mode,
+                                                               False,
+                                                               exclude_mobility,
+                                                               profile_bins,
+                                                               encoding)
+                                     for frame_start, frame_stop in frame_ranges)
+    return parse_frame_ranges_in_parallel(process_pool,
+                                          parse_maldi_chunk_to_list,
+                                          frame_ranges,
+                                          mode,
+                                          False,
+                                          exclude_mobility,
+                                          profile_bins,
+                                          encoding,
+                                          max_pending_tasks=2 * num_workers)
+
+
+def init_imzml_ibd_buffer(writer, buffer_size=16 * 1024 * 1024):
+    """
+    Reopen the .ibd binary data file of a pyimzML writer with a larger write buffer. pyimzML writes the m/z and
+    intensity arrays of each spectrum to the .ibd file separately, so a large buffer lets these small writes reach the
+    disk in big blocks. The .imzML file is only written once when the writer is closed and is left as is.
+
+    pyimzML.ImzMLWriter.ImzMLWriter has no option to set the buffer size, so this replaces its ibd file object after
+    ImzMLWriter.__init__() has written the UUID to the .ibd file. The SHA-1 checksum of the .ibd file is calculated
+    from the bytes passed to ImzMLWriter._write_ibd() and does not depend on the file object. Checked against the
+    ImzMLWriter.ibd and ImzMLWriter.ibd_filename attributes of pyimzML 1.5.5. The pyimzML fork that timsconvert
+    installs is not pinned to a release, so if the writer does not have these attributes or its .ibd file is not at
+    the expected position, it is left unchanged and the default buffer is used.
+
+    :param writer: Instance of pyimzml.ImzMLWriter.ImzMLWriter for output file.
+    :type writer: pyimzml.ImzMLWriter.ImzMLWriter
+    :param buffer_size: Size of the write buffer in bytes, defaults to 16 MB.
+    :type buffer_size: int
+    :return: True if the .ibd file was reopened with the larger buffer, False otherwise.
+    :rtype: bool
+    """
+    ibd = getattr(writer, 'ibd', None)
+    ibd_filename = getattr(writer, 'ibd_filename', None)
+    if ibd is None or ibd_filename is None or ibd.closed or not os.path.isfile(ibd_filename):
+        logging.info(get_timestamp() + ':' + 'Unsupported pyimzML writer, using the default .ibd write buffer...')
+        return False
+    ibd.flush()
+    offset = ibd.tell()
+    if offset != os.path.getsize(ibd_filename):
+        logging.info(get_timestamp() + ':' + 'Unexpected .ibd file position, using the default .ibd write buffer...')
+        return False
+    # Opened in read/write mode since continuous mode imzML files read m/z arrays back from the .ibd file.
+    buffered_ibd = open(ibd_filename, 'rb+', buffering=buffer_size)
+    buffered_ibd.seek(offset)
+    ibd.close()
+    writer.ibd = buffered_ibd
+    return True
+
+
+def release_imzml_ibd_pages(writer, released_offset=0, release_size=256 * 1024 * 1024):
+    """
+    Drop the data already written to the .ibd binary data file of a pyimzML writer from the page cache
+    (os.posix_fadvise(..., os.POSIX_FADV_DONTNEED)) so that it does not evict the TDF/TSF input data that is still
+    being read. Dirty pages and data still held in the Python write buffer cannot be dropped, so the file is flushed
+    and written back with os.fdatasync() first. To keep the cost of this low, pages are only released once at least
+    release_size bytes have been written since the last release. Does nothing on platforms without os.posix_fadvise
+    and os.fdatasync.
+
+    :param writer: Instance of pyimzml.ImzMLWriter.ImzMLWriter for output file.
+    :type writer: pyimzml.ImzMLWriter.ImzMLWriter
+    :param released_offset: Offset up to which the .ibd file was released by the previous call, defaults to 0.
+    :type released_offset: int
+    :param release_size: Minimum number of bytes written since the previous release before pages are released,
+        defaults to 256 MB.
+    :type release_size: int
+    :return: Offset up to which the .ibd file has been released, to be passed to the next call.
+    :rtype: int
+    """
+    if not hasattr(os, 'posix_fadvise') or not hasattr(os, 'fdatasync'):
+        return released_offset
+    offset = writer.ibd.tell()
+    if offset - released_offset < release_size:
+        return released_offset
+    try:
+        writer.ibd.flush()
+        os.fdatasync(writer.ibd.fileno())
+        os.posix_fadvise(writer.ibd.fileno(), 0, offset, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        return released_offset
+    return offset
+
+
 def write_maldi_ims_imzml(data, outdir, outfile, mode, exclude_mobility, profile_bins, imzml_mode, encoding,
-                          compression, chunk_size):
+                          compression, chunk_size, num_workers=1):
     """
     Parse and write out spectra to an imzML file from a MALDI-MS(/MS) MSI dataset using pyimzML.
 
@@ -894,6 +1387,9 @@ def write_maldi_ims_imzml(data, outdir, outfile, mode, exclude_mobility, profile
         timsconvert.write.write_lcms_chunk_to_mzml() for memory efficiency; larger chunk_size requires more memory
         during conversion.
     :type chunk_size: int
+    :param num_workers: Number of worker processes used to parse the frames in each chunk in parallel; 1 parses all
+        frames in the current process, defaults to 1.
+    :type num_workers: int
     """
     # Set polarity for run in imzML.
     polarity = list(set(data.analysis['Frames']['Polarity'].values.tolist()))
@@ -959,38 +1455,48 @@ def write_maldi_ims_imzml(data, outdir, outfile, mode, exclude_mobility, profile
                                  intensity_compression=compression_object,
                                  include_mobility=False)
 
+    init_imzml_ibd_buffer(writer)
+
+    # Frames in each chunk are parsed by worker processes that open their own copy of the dataset.
+    if num_workers > 1:
+        logging.info(get_timestamp() + ':' + 'Starting ' + str(num_workers) + ' parser processes...')
+        process_pool = init_parse_process_pool(data, num_workers)
+    else:
+        process_pool = None
+
     logging.info(get_timestamp() + ':' + 'Writing to .imzML file ' + os.path.join(outdir, outfile) + '...')
-    with writer as imzml_file:
-        chunk = 0
-        frames = data.analysis['Frames']['Id'].to_list()
-        while chunk + chunk_size + 1 <= len(frames):
-            chunk_list = []
-            for i, j in zip(frames[chunk:chunk + chunk_size], frames[chunk + 1: chunk + chunk_size + 1]):
-                chunk_list.append((int(i), int(j)))
-            logging.info(get_timestamp() + ':' + 'Parsing and writing Frame ' + ':' + str(chunk_list[0][0]) + '...')
-            for frame_start, frame_stop in chunk_list:
-                write_maldi_ims_chunk_to_imzml(data,
-                                               imzml_file,
-                                               frame_start,
-                                               frame_stop,
-                                               mode,
-                                               exclude_mobility,
-                                               profile_bins,
-                                               encoding)
-            chunk += chunk_size
-        else:
-            chunk_list = []
-            for i, j in zip(frames[chunk:-1], frames[chunk + 1:]):
-                chunk_list.append((int(i), int(j)))
-            chunk_list.append((j, data.analysis['Frames'].shape[0] + 1))
-            logging.info(get_timestamp() + ':' + 'Parsing and writing Frame ' + ':' + str(chunk_list[0][0]) + '...')
-            for frame_start, frame_stop in chunk_list:
-                write_maldi_ims_chunk_to_imzml(data,
-                                               imzml_file,
-                                               frame_start,
-                                               frame_stop,
-                                               mode,
-                                               exclude_mobility,
-                                               profile_bins,
-                                               encoding)
+    # Worker processes are shut down even if parsing or writing fails.
+    try:
+        with writer as imzml_file:
+            released_offset = 0
+            # Each frame is parsed on its own; the last frame range runs to the end of the dataset.
+            frame_starts = [int(i) for i in data.analysis['Frames']['Id'].values]
+            frame_ranges = list(zip(frame_starts, frame_starts[1:] + [data.analysis['Frames'].shape[0] + 1]))
+            # A single parser runs over the whole dataset, so parsing is not paused at the end of each chunk.
+            parsed_frame_ranges = iterate_maldi_ims_frame_ranges(data,
+                                                                 frame_ranges,
+                                                                 mode,
+                                                                 exclude_mobility,
+                                                                 profile_bins,
+                                                                 encoding,
+                                                                 process_pool=process_pool,
+                                                                 num_workers=num_workers)
+            # Closed explicitly so that the background thread or pending parse tasks stop if writing fails.
+            try:
+                for chunk in range(0, len(frame_ranges), chunk_size):
+                    chunk_list = frame_ranges[chunk: chunk + chunk_size]
+                    logging.info(get_timestamp() + ':' + 'Parsing and writing Frame ' + ':' + str(chunk_list[0][0]) +
+                                 '...')
+                    write_maldi_ims_chunk_list_to_imzml(data,
+                                                        imzml_file,
+                                                        chunk_list,
+                                                        parsed_frame_ranges,
+                                                        mode,
+                                                        exclude_mobility)
+                    released_offset = release_imzml_ibd_pages(imzml_file, released_offset)
+            finally:
+                parsed_frame_ranges.close()
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
     logging.info(get_timestamp() + ':' + 'Finished writing to .imzML file ' + os.path.join(outdir, outfile) + '...')